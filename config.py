@@ -8,6 +8,7 @@ RPI_CAMERA_RESOLUTION = (1280, 720)  # HD resolution for RPi Camera 3
 # RPI_CAMERA_RESOLUTION = (640, 780)
 RPI_CAMERA_FRAMERATE = 50
 RPI_CAMERA_WARMUP_TIME = 1  # seconds
+RPI_CAMERA_BUFFER_COUNT = 2  # frame buffers; few, so capture_array() never hands back a stale frame
 
 # Camera capture settings
 CAPTURE_QUALITY = 65  # JPEG quality (1-100)
@@ -4,6 +4,7 @@ from config import ADMIN_MENU
 from services.fingerprint import *
 from services.time_tracker import *
 from database.db_operations import *
+from controllers.guest import clear_recent_guests
 from utils.display_helpers import display_menu, get_user_input, confirm_action, display_separator, get_num
 
 import time
@@ -165,6 +166,7 @@ def admin_clear_time_records():
         return
     
     if clear_all_time_records():
+        clear_recent_guests()
         print("✅ All time records have been cleared.")
     else:
         print("❌ Failed to clear time records.")
@@ -1,50 +1,114 @@
 # controllers/guest.py - Updated for RPi Camera 3
 
-from services.license_reader import *
-from services.helmet_infer import verify_helmet
-from services.time_tracker import *
-from utils.display_helpers import display_separator, display_verification_result
-from utils.gui_helpers import show_results_gui, get_guest_info_gui, updated_guest_office_gui
-import tkinter as tk
-from tkinter import simpledialog, messagebox
-import difflib
-import time
+from services.license_reader import (
+    warmup_ocr, auto_capture_license_rpi, extract_text_from_image,
+    licenseReadGuest, cleanup_temp_file
+)
+from services.helmet_infer import verify_helmet, clear_helmet_cache
+from services.time_tracker import record_time_in, record_time_out, normalize_name
+from database import async_writer
+from database.db_operations import time_db
+from services.led_control import set_led_processing, set_led_idle
+from utils.display_helpers import display_verification_result
+from utils.gui_helpers import get_guest_info_gui, updated_guest_office_gui
+from utils.time_helpers import date_time_now
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from rapidfuzz import fuzz, process
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+
+# Precompiled OCR name-extraction patterns
+_INLINE_WS_RE = re.compile(r'[^\S\n]+')
+_DIGIT_RE = re.compile(r'\d')
+
+GUEST_NAME_FILTER_KEYWORDS = [
+    'ROAD', 'STREET', 'AVENUE', 'BOULEVARD', 'DISTRICT', 'CITY', 'PROVINCE',
+    'BARANGAY', 'SUBDIVISION', 'VILLAGE', 'TOWN', 'MUNICIPALITY', 'REGION',
+    'REPUBLIC', 'PHILIPPINES', 'DEPARTMENT', 'TRANSPORTATION', 
+    'LAND TRANSPORTATION OFFICE', 'DRIVER', 'LICENSE', 'NON-PROFESSIONAL',
+    'PROFESSIONAL', 'LAST NAME', 'FIRST NAME', 'MIDDLE NAME', 'NATIONALITY',
+    'DATE', 'BIRTH', 'ADDRESS', 'WEIGHT', 'HEIGHT', 'EYES', 'HAIR', 'SEX'
+]
+_NAME_FILTER_RE = re.compile('|'.join(map(re.escape, GUEST_NAME_FILTER_KEYWORDS)))
+
+# Background worker for work that can overlap the interactive guest steps
+_background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="guest-bg")
+
+# Guests timed in during this session, keyed by normalized name (LRU). Every access holds the
+# lock, so the cache stays consistent if it is touched off the main thread.
+RECENT_GUESTS_MAXSIZE = 128
+RECENT_GUEST_MIN_SIMILARITY = 0.95  # Only a near-exact name may skip the sqlite candidates
+_recent_guests = OrderedDict()
+_recent_guests_lock = threading.Lock()
+
+# Short-lived memo of sqlite guest status lookups (retakes re-check the same name). cachetools
+# caches are not thread-safe and this one is read from _background too, so it is used under a lock.
+GUEST_STATUS_TTL = 30
+_guest_status_cache = TTLCache(maxsize=64, ttl=GUEST_STATUS_TTL)
+_guest_status_lock = threading.Lock()
+
+@contextmanager
+def guest_flow_session():
+    """Hold the LED in processing for one guest flow; every exit path ends idle, a normal one at the menu prompt"""
+    set_led_processing()
+    try:
+        yield
+    finally:
+        clear_helmet_cache()  # A guest's helmet check is never reused by whoever scans next
+        set_led_idle()
+    input("\n📱 Press Enter to return to main menu...")
 
 def guest_verification():
     """Main guest verification workflow - FIXED VERSION"""
+    with guest_flow_session():
+        _guest_verification_flow()
+
+def _guest_verification_flow():
+    """Guest verification steps; returning early ends the flow"""
     print("\n👤 GUEST VERIFICATION SYSTEM")
     
+    # Warm Tesseract while the guest is busy with the helmet check
+    _background.submit(warmup_ocr)
+    
     # Step 1: Helmet verification (always required)
     if not verify_helmet():
-        input("\n📱 Press Enter to return to main menu...")
         return
     
+    # Load guest records from sqlite while the license is captured and read
+    latest_records = _background.submit(fetch_latest_guest_records)
+    
     # Step 2: Capture license
     print("📄 Starting license capture...")
     image_path = auto_capture_license_rpi()
     
     if not image_path:
         print("❌ License capture failed or cancelled.")
-        input("\n📱 Press Enter to return to main menu...")
         return
     
     # Step 3: Extract name from license
     ocr_preview = extract_text_from_image(image_path)
-    ocr_lines = [line.strip() for line in ocr_preview.splitlines() if line.strip()]
+    ocr_lines = normalize_ocr_lines(ocr_preview)
     detected_name = extract_guest_name_from_license(ocr_lines)
     
     print(f"📄 Detected name: {detected_name}")
     
     # Step 4: Check guest's current status
-    current_status, guest_info = get_guest_time_status(detected_name)
+    current_status, guest_info = get_guest_time_status(detected_name, latest_records=latest_records)
     
     if current_status == 'IN':
         # Guest is currently timed IN - Process TIME OUT
-        print(f"\n✅ Found currently timed-in guest: {guest_info['name']}")
-        print(f"🚗 Plate: {guest_info['plate_number']}")
-        print(f"📅 Timed in: {guest_info['last_date']} at {guest_info['last_time']}")
-        print(f"🎯 Match confidence: {guest_info['similarity_score']*100:.1f}%")
-        print("\n🔴 PROCESSING TIME OUT...")
+        print(f"\n✅ Found currently timed-in guest: {guest_info['name']}\n"
+              f"🚗 Plate: {guest_info['plate_number']}\n"
+              f"📅 Timed in: {guest_info['last_date']} at {guest_info['last_time']}\n"
+              f"🎯 Match confidence: {guest_info['similarity_score']*100:.1f}%\n"
+              "\n🔴 PROCESSING TIME OUT...")
+        
+        # Name match already identifies the guest; no second license read on TIME OUT
+        cleanup_temp_file(image_path)
         
         # Process time out
         time_result = process_guest_time_out(guest_info)
@@ -79,18 +143,17 @@ Status: {time_result['status']}
         
     elif current_status == 'OUT' and guest_info is not None:
         # Guest was found but is currently timed OUT - Process TIME IN with existing info
-        print(f"\n✅ Found previous guest (currently timed out): {guest_info['name']}")
-        print(f"🚗 Plate: {guest_info['plate_number']}")
-        print(f"📅 Last activity: {guest_info['last_date']} at {guest_info['last_time']} (TIME OUT)")
-        print(f"🎯 Match confidence: {guest_info['similarity_score']*100:.1f}%")
-        print("\n🟢 PROCESSING TIME IN FOR RETURNING GUEST...")
+        print(f"\n✅ Found previous guest (currently timed out): {guest_info['name']}\n"
+              f"🚗 Plate: {guest_info['plate_number']}\n"
+              f"📅 Last activity: {guest_info['last_date']} at {guest_info['last_time']} (TIME OUT)\n"
+              f"🎯 Match confidence: {guest_info['similarity_score']*100:.1f}%\n"
+              "\n🟢 PROCESSING TIME IN FOR RETURNING GUEST...")
         
         # Get the updated office information from the GUI
         updated_guest_info = updated_guest_office_gui(guest_info['name'], guest_info.get('office', 'CSS Office'))
         
         if not updated_guest_info:
             print("❌ Guest office update cancelled.")
-            input("\n📱 Press Enter to return to main menu...")
             return
         
         # Process the time-in with the updated office
@@ -112,7 +175,7 @@ Status: {time_result['status']}
             'is_guest': True
         }
         
-        license_result = licenseReadGuest(image_path, guest_data_for_license)
+        license_result = licenseReadGuest(image_path, guest_data_for_license, ocr_text=ocr_preview)
         time_result = process_guest_time_in(existing_guest_info, license_result)
         print(f"\n🕒 {time_result['message']}")
         
@@ -149,13 +212,12 @@ Status: {time_result['status']}
         
         if not guest_info_input:
             print("❌ Guest information cancelled.")
-            input("\n📱 Press Enter to return to main menu...")
             return
         
-        print(f"✅ Guest info collected:")
-        print(f"   👤 Name: {guest_info_input['name']}")
-        print(f"   🚗 Plate: {guest_info_input['plate_number']}")
-        print(f"   🏢 Office: {guest_info_input['office']}")
+        print(f"✅ Guest info collected:\n"
+              f"   👤 Name: {guest_info_input['name']}\n"
+              f"   🚗 Plate: {guest_info_input['plate_number']}\n"
+              f"   🏢 Office: {guest_info_input['office']}")
         
         # Process license verification
         guest_data_for_license = {
@@ -169,14 +231,14 @@ Status: {time_result['status']}
             'is_guest': True
         }
         
-        license_result = licenseReadGuest(image_path, guest_data_for_license)
+        license_result = licenseReadGuest(image_path, guest_data_for_license, ocr_text=ocr_preview)
         
         # Process time in
         time_result = process_guest_time_in(guest_info_input, license_result)
         print(f"\n🕒 {time_result['message']}")
         
         # Create verification data
-        license_verified = "Driver's License Detected" in license_result.document_verified
+        license_verified = license_result.license_detected
         
         verification_checks = {
             '🪖 Helmet': (True, 'VERIFIED'),
@@ -208,28 +270,21 @@ Status: {time_result['status']}
     }
     
     display_verification_result(guest_data, verification_data)
-    input("\n📱 Press Enter to return to main menu...")
+
+def normalize_ocr_lines(ocr_text):
+    """Upper-case OCR text, collapse inline whitespace and drop blank lines"""
+    normalized = _INLINE_WS_RE.sub(' ', ocr_text.upper())
+    return [clean for line in normalized.split('\n') if (clean := line.strip())]
 
 def extract_guest_name_from_license(ocr_lines):
-    """Extract guest name from license OCR with improved accuracy"""
-    filter_keywords = [
-        'ROAD', 'STREET', 'AVENUE', 'BOULEVARD', 'DISTRICT', 'CITY', 'PROVINCE',
-        'BARANGAY', 'SUBDIVISION', 'VILLAGE', 'TOWN', 'MUNICIPALITY', 'REGION',
-        'REPUBLIC', 'PHILIPPINES', 'DEPARTMENT', 'TRANSPORTATION', 
-        'LAND TRANSPORTATION OFFICE', 'DRIVER', 'LICENSE', 'NON-PROFESSIONAL',
-        'PROFESSIONAL', 'LAST NAME', 'FIRST NAME', 'MIDDLE NAME', 'NATIONALITY',
-        'DATE', 'BIRTH', 'ADDRESS', 'WEIGHT', 'HEIGHT', 'EYES', 'HAIR', 'SEX'
-    ]
-    
+    """Extract guest name from normalized license OCR lines with improved accuracy"""
     potential_names = []
     
-    for line in ocr_lines:
-        line_clean = line.strip().upper()
-        
+    for line_clean in ocr_lines:
         # Skip invalid lines
-        if (not line_clean or len(line_clean) < 5 or len(line_clean) > 50 or
-            any(keyword in line_clean for keyword in filter_keywords) or
-            any(char.isdigit() for char in line_clean)):
+        if (len(line_clean) < 5 or len(line_clean) > 50 or
+            _NAME_FILTER_RE.search(line_clean) or
+            _DIGIT_RE.search(line_clean)):
             continue
         
         # Look for name patterns
@@ -249,150 +304,167 @@ def extract_guest_name_from_license(ocr_lines):
     return "Guest"
 
 
-def find_timed_in_guest(detected_name):
-    """Find a currently timed-in guest by name matching - SIMPLIFIED"""
-    try:
-        import sqlite3
-        from difflib import SequenceMatcher
-        
-        conn = sqlite3.connect("database/time_tracking.db")
-        cursor = conn.cursor()
-        
-        # Get all currently timed-in guests (status = 'IN')
-        cursor.execute("""
-            SELECT student_name, student_id, date, time 
-            FROM time_records 
-            WHERE status = 'IN' AND student_id LIKE 'GUEST_%'
-            ORDER BY date DESC, time DESC
-        """)
-        
-        timed_in_guests = cursor.fetchall()
-        conn.close()
-        
-        if not timed_in_guests:
-            return None
-        
-        print(f"🔍 Checking {len(timed_in_guests)} timed-in guests...")
-        
-        # Find best name match
-        best_match = None
-        highest_similarity = 0.0
-        
-        for guest_record in timed_in_guests:
-            guest_name = guest_record[0]
-            
-            # Calculate similarity
-            similarity = SequenceMatcher(None, detected_name.upper(), guest_name.upper()).ratio()
-            
-            # Boost for substring matches
-            if (detected_name.upper() in guest_name.upper() or 
-                guest_name.upper() in detected_name.upper()):
-                similarity = max(similarity, 0.8)
-            
-            print(f"   📋 Comparing: '{detected_name}' vs '{guest_name}' = {similarity:.2f}")
-            
-            if similarity > highest_similarity and similarity > 0.6:  # 60% threshold
-                highest_similarity = similarity
-                best_match = guest_record
-        
-        if best_match:
-            # Extract plate number from student_id (GUEST_PLATENUM format)
-            plate_number = best_match[1].replace('GUEST_', '')
-            
-            return {
-                'name': best_match[0],
-                'student_id': best_match[1],
-                'plate_number': plate_number,
-                'office': 'Previous Visit',  # Simplified since we don't store office
-                'time_in_date': best_match[2],
-                'time_in_time': best_match[3],
-                'similarity_score': highest_similarity
-            }
-        
-        return None
-        
-    except Exception as e:
-        print(f"❌ Error finding timed-in guest: {e}")
-        return None
-        
-def get_guest_time_status(detected_name, plate_number=None):
+def get_guest_time_status(detected_name, plate_number=None, latest_records=None):
     """
     Get the current time status of a guest based on name matching
+    latest_records: optional Future from fetch_latest_guest_records() started earlier
     Returns: ('IN', guest_info) if currently timed in, ('OUT', guest_info) if found but timed out, (None, None) if not found
     """
+    detected_norm = normalize_name(detected_name)
+    
+    # Guests timed in during this session are answered from memory
+    status, guest_info = _match_recent_guest(detected_norm, plate_number)
+    if guest_info:
+        print(f"⚡ Matched recent guest: {guest_info['name']} ({guest_info['similarity_score']*100:.1f}%)")
+        return status, guest_info
+    
     try:
-        import sqlite3
-        from difflib import SequenceMatcher
-        
-        conn = sqlite3.connect("database/time_tracking.db")
-        cursor = conn.cursor()
-        
-        # Get the latest record for each guest to determine current status
-        cursor.execute("""
-            SELECT student_name, student_id, status, date, time,
-                   ROW_NUMBER() OVER (PARTITION BY student_id ORDER BY date DESC, time DESC) as row_num
-            FROM time_records 
-            WHERE student_id LIKE 'GUEST_%'
-        """)
-        
-        all_records = cursor.fetchall()
-        conn.close()
-        
-        # Filter to get only the latest record for each guest
-        latest_records = [record for record in all_records if record[5] == 1]  # row_num = 1
-        
-        if not latest_records:
-            return None, None
+        return _lookup_guest_time_status(detected_norm, plate_number, latest_records)
+    except Exception as e:
+        print(f"❌ Error checking guest status: {e}")
+        return None, None
+
+def fetch_latest_guest_records():
+    """Load the latest time record of every guest"""
+    # Make sure queued time IN/OUT writes are visible before reading
+    async_writer.flush()
+    
+    # Get only the latest record for each guest to determine current status
+    with time_db() as conn:
+        return conn.execute("""
+            SELECT student_name, student_id, status, date, time, row_num, student_name_norm
+            FROM (
+                SELECT student_name, student_id, status, date, time, student_name_norm,
+                       ROW_NUMBER() OVER (PARTITION BY student_id ORDER BY date DESC, time DESC) as row_num
+                FROM time_records 
+                WHERE student_id LIKE 'GUEST_%'
+            )
+            WHERE row_num = 1
+        """).fetchall()
+
+def _guest_status_key(detected_norm, plate_number=None, latest_records=None):
+    """Cache key for _lookup_guest_time_status (the prefetched records don't affect the answer)"""
+    return hashkey(detected_norm, plate_number)
+
+@cached(_guest_status_cache, key=_guest_status_key, lock=_guest_status_lock)
+def _lookup_guest_time_status(detected_norm, plate_number=None, latest_records=None):
+    """Match a normalized name against each guest's latest time record (cached for GUEST_STATUS_TTL seconds)"""
+    if latest_records is not None:
+        latest_records = latest_records.result()
+    else:
+        latest_records = fetch_latest_guest_records()
+    
+    if not latest_records:
+        return None, None
+    
+    print(f"🔍 Checking {len(latest_records)} guest records for name match...")
+    
+    # Find best name match (base ratios for all guests scored in one C call)
+    best_match = None
+    highest_similarity = 0.0
+    ratios = process.cdist([detected_norm], [record[6] for record in latest_records],
+                           scorer=fuzz.ratio, workers=-1)[0]
+    
+    for record, ratio in zip(latest_records, ratios):
+        guest_name, guest_norm = record[0], record[6]
+        similarity = guest_name_similarity(detected_norm, guest_norm, plate_number,
+                                           record[1].replace('GUEST_', ''), ratio)
         
-        print(f"🔍 Checking {len(latest_records)} guest records for name match...")
+        print(f"   📋 Comparing: '{detected_norm}' vs '{guest_name}' = {similarity:.2f}")
         
-        # Find best name match
-        best_match = None
-        highest_similarity = 0.0
+        if similarity > highest_similarity and similarity > 0.6:  # 60% threshold
+            highest_similarity = similarity
+            best_match = record
+    
+    if best_match:
+        guest_info = {
+            'name': best_match[0],
+            'student_id': best_match[1],
+            'plate_number': best_match[1].replace('GUEST_', ''),
+            'office': 'Previous Visit',
+            'current_status': best_match[2],  # 'IN' or 'OUT'
+            'last_date': best_match[3],
+            'last_time': best_match[4],
+            'similarity_score': highest_similarity
+        }
         
-        for record in latest_records:
-            guest_name = record[0]
-            
-            # Calculate similarity
-            similarity = SequenceMatcher(None, detected_name.upper(), guest_name.upper()).ratio()
-            
-            # Boost for substring matches
-            if (detected_name.upper() in guest_name.upper() or 
-                guest_name.upper() in detected_name.upper()):
-                similarity = max(similarity, 0.8)
-            
-            # Additional boost for plate number match if provided
-            if plate_number:
-                guest_plate = record[1].replace('GUEST_', '')
-                if plate_number.upper() == guest_plate.upper():
-                    similarity = max(similarity, 0.9)
-            
-            print(f"   📋 Comparing: '{detected_name}' vs '{guest_name}' = {similarity:.2f}")
-            
-            if similarity > highest_similarity and similarity > 0.6:  # 60% threshold
+        return best_match[2], guest_info  # Return status and guest info
+    
+    return None, None
+
+def guest_name_similarity(detected_norm, guest_norm, plate_number=None, guest_plate=None, ratio=None):
+    """Score a normalized detected name against a normalized guest name (0.0 - 1.0); ratio is a precomputed fuzz.ratio"""
+    if ratio is None:
+        ratio = fuzz.ratio(detected_norm, guest_norm)
+    similarity = float(ratio) / 100.0
+    
+    # Boost for substring matches
+    if detected_norm in guest_norm or guest_norm in detected_norm:
+        similarity = max(similarity, 0.8)
+    
+    # Additional boost for plate number match if provided
+    if plate_number and guest_plate and plate_number.upper() == guest_plate.upper():
+        similarity = max(similarity, 0.9)
+    
+    return similarity
+
+# =================== RECENT GUEST CACHE ===================
+
+def remember_recent_guest(guest_info, stamp):
+    """Cache a guest that was just timed in (at stamp) so a return check skips sqlite"""
+    name_norm = normalize_name(guest_info['name'])
+    cached = {
+        'name': guest_info['name'],
+        'student_id': f"GUEST_{guest_info['plate_number']}",
+        'plate_number': guest_info['plate_number'],
+        'office': guest_info['office'],
+        'current_status': 'IN',
+        'last_date': stamp[0],
+        'last_time': stamp[1],
+        'name_norm': name_norm
+    }
+    with _recent_guests_lock:
+        _recent_guests[name_norm] = cached
+        _recent_guests.move_to_end(name_norm)
+        while len(_recent_guests) > RECENT_GUESTS_MAXSIZE:
+            _recent_guests.popitem(last=False)
+
+def forget_recent_guest(guest_info):
+    """Invalidate a cached guest after a time out"""
+    with _recent_guests_lock:
+        _recent_guests.pop(normalize_name(guest_info['name']), None)
+
+def clear_recent_guests():
+    """Invalidate the whole recent guest cache (e.g. after time records are cleared)"""
+    with _recent_guests_lock:
+        _recent_guests.clear()
+    clear_guest_status_cache()
+
+def clear_guest_status_cache():
+    """Drop every memoized guest status (after any guest time IN/OUT)"""
+    with _guest_status_lock:
+        _guest_status_cache.clear()
+
+def _match_recent_guest(detected_norm, plate_number=None):
+    """Match the detected name against guests cached this session; only a near-exact match counts,
+    since a merely similar name (e.g. another guest's) must still be weighed against sqlite"""
+    best_match = None
+    highest_similarity = 0.0
+    
+    with _recent_guests_lock:
+        for name_norm, cached in _recent_guests.items():
+            similarity = guest_name_similarity(detected_norm, name_norm, plate_number, cached['plate_number'])
+            if similarity > highest_similarity and similarity >= RECENT_GUEST_MIN_SIMILARITY:
                 highest_similarity = similarity
-                best_match = record
+                best_match = cached
         
-        if best_match:
-            guest_info = {
-                'name': best_match[0],
-                'student_id': best_match[1],
-                'plate_number': best_match[1].replace('GUEST_', ''),
-                'office': 'Previous Visit',
-                'current_status': best_match[2],  # 'IN' or 'OUT'
-                'last_date': best_match[3],
-                'last_time': best_match[4],
-                'similarity_score': highest_similarity
-            }
-            
-            return best_match[2], guest_info  # Return status and guest info
-        
-        return None, None
+        if best_match is None:
+            return None, None
         
-    except Exception as e:
-        print(f"❌ Error checking guest status: {e}")
-        return None, None
-
+        _recent_guests.move_to_end(best_match['name_norm'])
+    guest_info = {key: value for key, value in best_match.items() if key != 'name_norm'}
+    guest_info['similarity_score'] = highest_similarity
+    return guest_info['current_status'], guest_info
 
 def create_guest_time_data(guest_info):
     """Create standardized guest data for time tracking"""
@@ -413,11 +485,15 @@ def process_guest_time_in(guest_info, license_result):
                        "Document Detected" in license_result.document_verified)
     
     if license_verified:
-        if record_time_in(guest_time_data):
+        # The sqlite commit runs on the writer thread, queued behind any pending write
+        stamp = date_time_now()
+        if _wait_for_write(async_writer.submit(record_time_in, guest_time_data, stamp)):
+            remember_recent_guest(guest_info, stamp)
+            clear_guest_status_cache()
             return {
                 'success': True,
                 'status': "✅ GUEST TIME IN SUCCESSFUL",
-                'message': f"🟢 TIME IN recorded at {time.strftime('%H:%M:%S')}",
+                'message': f"🟢 TIME IN recorded at {stamp[1]}",
                 'color': "🟢"
             }
         else:
@@ -439,11 +515,15 @@ def process_guest_time_out(guest_info):
     """Process guest time out"""
     guest_time_data = create_guest_time_data(guest_info)
     
-    if record_time_out(guest_time_data):
+    # The sqlite commit runs on the writer thread, queued behind any pending write
+    stamp = date_time_now()
+    if _wait_for_write(async_writer.submit(record_time_out, guest_time_data, stamp)):
+        forget_recent_guest(guest_info)
+        clear_guest_status_cache()
         return {
             'success': True,
             'status': "✅ GUEST TIME OUT SUCCESSFUL",
-            'message': f"🔴 TIME OUT recorded at {time.strftime('%H:%M:%S')}",
+            'message': f"🔴 TIME OUT recorded at {stamp[1]}",
             'color': "🟢"
         }
     else:
@@ -453,3 +533,10 @@ def process_guest_time_out(guest_info):
             'message': "❌ Failed to record TIME OUT",
             'color': "🔴"
         }
+
+def _wait_for_write(write):
+    """Block on a queued time record write (milliseconds); False if it failed or raised"""
+    try:
+        return bool(write.result())
+    except Exception:
+        return False
@@ -1,15 +1,20 @@
 # controllers/student.py - Updated for RPi Camera 3
 
 from services.fingerprint import authenticate_fingerprint
-from services.license_reader import *
-from services.helmet_infer import verify_helmet
-from services.time_tracker import *
+from services.license_reader import auto_capture_license_rpi, licenseRead
+from services.helmet_infer import verify_helmet, clear_helmet_cache
+from services.time_tracker import get_student_time_status, record_time_in, record_time_out
 from services.led_control import set_led_processing, set_led_success, set_led_idle
+from database import async_writer
 
-from utils.display_helpers import display_separator, display_verification_result
-from utils.gui_helpers import show_results_gui
+from utils.display_helpers import display_verification_result
+from utils.time_helpers import date_time_now
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Fingerprint sensor waits run here so the finger can be placed during the helmet check
+_fingerprint_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fingerprint")
 
-import time
 
 def student_verification():
     """Main student verification workflow with integrated time tracking and LED status"""
@@ -18,92 +23,116 @@ def student_verification():
     # Set LED to processing state when student verification starts
     set_led_processing()
     
-    # Step 1: Helmet verification (always required)
-    if not verify_helmet_check():
-        print("❌ Helmet verification failed - returning to idle state")
-        set_led_idle()  # Return to idle on failure
-        input("\n📱 Press Enter to return to main menu...")
-        return
+    # Step 2 starts first: the sensor is armed while the helmet camera window runs
+    cancel_fingerprint = threading.Event()
+    fingerprint_result = _fingerprint_worker.submit(authenticate_fingerprint, cancel_fingerprint)
+    
+    helmet_ok = False
+    student_info = None
+    try:
+        # Step 1: Helmet verification (always required; a helmet failure wins over any fingerprint)
+        helmet_ok = verify_helmet_check()
+        
+        # Step 2: Fingerprint authentication (the sensor prompt is printed by authenticate_fingerprint)
+        if helmet_ok:
+            student_info = fingerprint_result.result()
+    finally:
+        # Any exit without a student (helmet failure, camera/model error, Ctrl+C) stops the sensor
+        # poll, so it cannot swallow the next user's finger
+        if student_info is None:
+            cancel_fingerprint.set()
     
-    # Step 2: Fingerprint authentication
-    print("🔒 Place your finger on the sensor...")
-    student_info = authenticate_fingerprint()
+    if not helmet_ok:
+        return _fail("❌ Helmet verification failed - returning to idle state")
     
     if not student_info:
-        print("❌ Authentication failed. Access denied.")
-        set_led_idle()  # Return to idle on failure
-        input("\n📱 Press Enter to return to main menu...")
-        return
+        return _fail("❌ Authentication failed. Access denied.")
     
-    # Display authentication success
-    print(f"✅ Welcome: {student_info['name']} (ID: {student_info['student_id']})")
+    # The verified helmet belonged to this student; the next person must be checked afresh
+    clear_helmet_cache()
     
-    # Step 3: Check current time status
+    # Step 3: Check current time status, then greet with it in one write
     current_status = get_student_time_status(student_info['student_id'])
-    print(f"📊 Current Status: {current_status}")
+    print(f"✅ Welcome: {student_info['name']} (ID: {student_info['student_id']})\n"
+          f"📊 Current Status: {current_status}")
     
-    if current_status == 'OUT' or current_status is None:
-        # Student is timing IN - full verification required
-        print("\n🟢 TIMING IN - Full verification required")
-        
-        # Step 4: License verification for TIME IN
-        print("📄 Starting license verification...")
-        image_path = auto_capture_license_rpi(reference_name=student_info['name'], 
-                                           fingerprint_info=student_info)
-        
-        if not image_path:
-            print("❌ License capture failed or cancelled.")
-            set_led_idle()  # Return to idle on failure
-            input("\n📱 Press Enter to return to main menu...")
-            return
-        
-        # Process license
-        ocr_preview = extract_text_from_image(image_path)
-        ocr_lines = [line.strip() for line in ocr_preview.splitlines() if line.strip()]
-        name_from_ocr, sim_score = find_best_line_match(student_info['name'], ocr_lines)
-        result = licenseRead(image_path, student_info)
-        
-        # Prepare verification data
-        verification_checks = {
-            '🪖 Helmet': (True, 'VERIFIED'),
-            '🔒 Fingerprint': (student_info['confidence'] > 50, f"VERIFIED ({student_info['confidence']}%)"),
-            '🆔 License Detection': ("Driver's License Detected" in result.document_verified, 'VERIFIED' if "Driver's License Detected" in result.document_verified else 'FAILED'),
-            '👤 Name Matching': (sim_score > 0.5 if sim_score else False, f"VERIFIED ({sim_score * 100:.1f}%)" if sim_score and sim_score > 0.5 else 'FAILED')
-        }
-        
-        all_verified = all(status for status, _ in verification_checks.values())
-        partial_verified = verification_checks['🪖 Helmet'][0] and verification_checks['🔒 Fingerprint'][0] and verification_checks['🆔 License Detection'][0]
+    # No record yet, or last seen leaving: this scan is a TIME IN
+    is_time_in = current_status in (None, 'OUT')
+    
+    if is_time_in:
+        verification_data = _time_in_flow(student_info)
+    else:
+        verification_data = _time_out_flow(student_info)
+    
+    if verification_data is None:
+        return
+    
+    display_verification_result(student_info, verification_data)
+    input("\n📱 Press Enter to return to main menu...")
+    
+    # Note: LED will either be in success state (auto-returning to idle) or already in idle state
+
+def _time_in_flow(student_info):
+    """TIME IN: license capture and name match on top of helmet + fingerprint; None if capture fails"""
+    # Fields read throughout the flow, looked up once
+    name = student_info['name']
+    confidence = student_info['confidence']
+    fingerprint_ok = confidence > 50
+    
+    # Step 4: License verification for TIME IN
+    print("\n🟢 TIMING IN - Full verification required\n"
+          "📄 Starting license verification...")
+    image_path = auto_capture_license_rpi(reference_name=name, 
+                                       fingerprint_info=student_info)
+    
+    if not image_path:
+        return _fail("❌ License capture failed or cancelled.")
+    
+    # Process license (licenseRead does the OCR, keyword and name-match work in one place)
+    result = licenseRead(image_path, student_info)
+    sim_score = result.match_score
+    name_matched = bool(sim_score and sim_score > 0.5)
+    license_detected = result.license_detected
+    
+    # Prepare verification data
+    verification_checks = {
+        '🪖 Helmet': (True, 'VERIFIED'),
+        '🔒 Fingerprint': (fingerprint_ok, f"VERIFIED ({confidence}%)"),
+        '🆔 License Detection': (license_detected, 'VERIFIED' if license_detected else 'FAILED'),
+        '👤 Name Matching': (name_matched, f"VERIFIED ({sim_score * 100:.1f}%)" if name_matched else 'FAILED')
+    }
+    
+    all_verified = all(status for status, _ in verification_checks.values())
+    partial_verified = fingerprint_ok and license_detected  # Helmet already passed
+    
+    if all_verified:
+        overall_status = "✅ TIME IN SUCCESSFUL"
+        status_color = "🟢"
         
-        if all_verified:
-            overall_status = "✅ TIME IN SUCCESSFUL"
-            status_color = "🟢"
-            
-            # Record time in for successful verification
-            if record_time_in(student_info):
-                time_message = f"🟢 TIME IN recorded at {time.strftime('%H:%M:%S')}"
-                # Set LED to success (green) for successful time in
-                set_led_success(duration=5.0)  # Green for 5 seconds, then auto-return to idle
-            else:
-                time_message = "❌ Failed to record TIME IN"
-                set_led_idle()  # Return to idle on database failure
-            
-            print(f"\n🕒 {time_message}")
-            
-        elif partial_verified:
-            overall_status = "⚠️ PARTIAL VERIFICATION - TIME IN DENIED"
-            status_color = "🟡"
-            time_message = "❌ Time IN denied due to incomplete verification"
-            set_led_idle()  # Return to idle on partial verification
+        # Record time in for successful verification
+        stamp = date_time_now()
+        if _record_with_feedback(record_time_in, student_info, stamp):
+            time_message = f"🟢 TIME IN recorded at {stamp[1]}"
         else:
-            overall_status = "❌ VERIFICATION FAILED - TIME IN DENIED"
-            status_color = "🔴"
-            time_message = "❌ Time IN denied due to failed verification"
-            set_led_idle()  # Return to idle on failed verification
+            time_message = "❌ Failed to record TIME IN"
         
-        gui_message = f"""
+        print(f"\n🕒 {time_message}")
+        
+    elif partial_verified:
+        overall_status = "⚠️ PARTIAL VERIFICATION - TIME IN DENIED"
+        status_color = "🟡"
+        time_message = "❌ Time IN denied due to incomplete verification"
+        set_led_idle()  # Return to idle on partial verification
+    else:
+        overall_status = "❌ VERIFICATION FAILED - TIME IN DENIED"
+        status_color = "🔴"
+        time_message = "❌ Time IN denied due to failed verification"
+        set_led_idle()  # Return to idle on failed verification
+    
+    gui_message = f"""
 TIME IN Verification Complete!
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-👤 Student: {student_info['name']}
+👤 Student: {name}
 🆔 Student ID: {student_info['student_id']}
 📚 Course: {student_info['course']}
 🪪 License: {student_info['license_number']}
@@ -111,33 +140,40 @@ TIME IN Verification Complete!
 {time_message}
 Status: {overall_status}
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-        """
-        
+    """
+    
+    return {
+        'checks': verification_checks,
+        'overall_status': overall_status,
+        'status_color': status_color,
+        'gui_message': gui_message
+    }
+
+def _time_out_flow(student_info):
+    """TIME OUT: helmet + fingerprint are enough, so go straight to the record write"""
+    confidence = student_info['confidence']
+    
+    print("\n🔴 TIMING OUT - Helmet and fingerprint verification only")
+    
+    verification_checks = {
+        '🪖 Helmet': (True, 'VERIFIED'),
+        '🔒 Fingerprint': (confidence > 50, f"VERIFIED ({confidence}%)")
+    }
+    
+    # Record time out
+    stamp = date_time_now()
+    if _record_with_feedback(record_time_out, student_info, stamp):
+        overall_status = "✅ TIME OUT SUCCESSFUL"
+        status_color = "🟢"
+        time_message = f"🔴 TIME OUT recorded at {stamp[1]}"
     else:
-        # Student is timing OUT - only helmet + fingerprint required
-        print("\n🔴 TIMING OUT - Helmet and fingerprint verification only")
-        
-        verification_checks = {
-            '🪖 Helmet': (True, 'VERIFIED'),
-            '🔒 Fingerprint': (student_info['confidence'] > 50, f"VERIFIED ({student_info['confidence']}%)")
-        }
-        
-        # Record time out
-        if record_time_out(student_info):
-            overall_status = "✅ TIME OUT SUCCESSFUL"
-            status_color = "🟢"
-            time_message = f"🔴 TIME OUT recorded at {time.strftime('%H:%M:%S')}"
-            # Set LED to success (green) for successful time out
-            set_led_success(duration=5.0)  # Green for 5 seconds, then auto-return to idle
-        else:
-            overall_status = "❌ TIME OUT FAILED"
-            status_color = "🔴"
-            time_message = "❌ Failed to record TIME OUT"
-            set_led_idle()  # Return to idle on failure
-        
-        print(f"\n🕒 {time_message}")
-        
-        gui_message = f"""
+        overall_status = "❌ TIME OUT FAILED"
+        status_color = "🔴"
+        time_message = "❌ Failed to record TIME OUT"
+    
+    print(f"\n🕒 {time_message}")
+    
+    gui_message = f"""
 TIME OUT Complete!
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 👤 Student: {student_info['name']}
@@ -147,20 +183,30 @@ TIME OUT Complete!
 {time_message}
 Status: {overall_status}
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-        """
+    """
     
-    verification_data = {
+    return {
         'checks': verification_checks,
         'overall_status': overall_status,
         'status_color': status_color,
         'gui_message': gui_message
     }
-    
-    display_verification_result(student_info, verification_data)
+
+def _record_with_feedback(record, student_info, stamp):
+    """Commit a time record on the writer thread with the success LED already lit; back to idle if it fails"""
+    write = async_writer.submit(record, student_info, stamp)
+    set_led_success(duration=5.0)  # Green for 5 seconds, then auto-return to idle
+    if write.result():
+        return True
+    set_led_idle()  # Return to idle on database failure
+    return False
+
+def _fail(message):
+    """End the flow after a failed step: report it, return the LED to idle and wait at the menu prompt"""
+    print(message)
+    set_led_idle()
     input("\n📱 Press Enter to return to main menu...")
-    
-    # Note: LED will either be in success state (auto-returning to idle) or already in idle state
-    
+
 # =================== VERIFICATION FUNCTIONS ===================
 
 def verify_helmet_check():
@@ -0,0 +1,45 @@
+# database/async_writer.py - Queued background writer so disk I/O never blocks the verification flow
+
+import queue
+import threading
+from concurrent.futures import Future
+
+WRITE_QUEUE_SIZE = 64
+
+_write_queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+_writer_thread = None
+_writer_lock = threading.Lock()
+
+def _writer_loop():
+    """Run queued write operations one at a time, in submission order"""
+    while True:
+        future, func, args, kwargs = _write_queue.get()
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(func(*args, **kwargs))
+                except Exception as e:
+                    print(f"❌ Background write failed: {e}")
+                    future.set_exception(e)
+        finally:
+            _write_queue.task_done()
+
+def _ensure_writer():
+    """Start the daemon writer thread on first use"""
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(target=_writer_loop, name="db-writer", daemon=True)
+            _writer_thread.start()
+
+def submit(func, *args, **kwargs):
+    """Queue func(*args, **kwargs) on the writer thread and return a Future for its result"""
+    _ensure_writer()
+    future = Future()
+    _write_queue.put((future, func, args, kwargs))
+    return future
+
+def flush():
+    """Block until every queued write has completed"""
+    if _writer_thread is not None:
+        _write_queue.join()
@@ -1,8 +1,50 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+TIME_TRACKING_DB = "database/time_tracking.db"
+
+# One time_tracking.db connection per thread, opened on first use; WAL lets the writer thread and
+# readers work side by side instead of queueing on a shared connection. The generation number
+# retires every thread's connection at once when close_time_db() runs.
+_time_db_local = threading.local()
+_time_db_conns = []
+_time_db_generation = 0
+_time_db_lock = threading.Lock()
+
+def _open_time_db():
+    """Open time_tracking.db in WAL mode so status reads don't wait on the writer thread"""
+    conn = sqlite3.connect(TIME_TRACKING_DB, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=5000')  # sqlite3's default lock wait; writer and readers share the file
+    conn.execute('PRAGMA cache_size=-20000')
+    return conn
+
+@contextmanager
+def time_db():
+    """Borrow this thread's time_tracking.db connection for one unit of work"""
+    local = _time_db_local
+    if getattr(local, 'generation', None) != _time_db_generation:
+        conn = _open_time_db()
+        with _time_db_lock:
+            _time_db_conns.append(conn)
+            local.conn, local.generation = conn, _time_db_generation
+    yield local.conn
+
+def close_time_db():
+    """Close every thread's time_tracking.db connection (each reopens on next use)"""
+    global _time_db_generation
+    with _time_db_lock:
+        _time_db_generation += 1
+        for conn in _time_db_conns:
+            conn.close()
+        _time_db_conns.clear()
+
 def init_guest_database():
     """Initialize clean guest database structure"""
     try:
-        import sqlite3
-        
         # Only use time_tracking.db for all guest operations
         conn = sqlite3.connect("time_tracking.db")
         cursor = conn.cursor()
@@ -13,6 +55,7 @@ def init_guest_database():
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 student_id TEXT NOT NULL,
                 student_name TEXT NOT NULL,
+                student_name_norm TEXT,
                 date TEXT NOT NULL,
                 time TEXT NOT NULL,
                 status TEXT NOT NULL,
@@ -46,9 +89,6 @@ def init_guest_database():
 def cleanup_guest_data():
     """Clean up any orphaned guest data"""
     try:
-        import sqlite3
-        import os
-        
         # Remove old guest_info.db if it exists
         if os.path.exists("database/guest_info.db"):
             os.remove("database/guest_info.db")
@@ -5,13 +5,17 @@ from controllers.admin import admin_panel
 from controllers.student import student_verification
 from controllers.guest import guest_verification
 from utils.display_helpers import display_menu, get_user_input, display_separator, get_num
-from services.fingerprint import *
-from services.license_reader import *
-from services.helmet_infer import *
+from services.fingerprint import finger, init_time_database, load_fingerprint_database
+from services.helmet_infer import get_helmet_session, warmup_helmet_model
+from services.license_reader import warmup_ocr
 from services.led_control import init_led_system, set_led_idle, cleanup_led_system
 from services.rpi_camera import get_camera, release_camera
-from time_tracker import *
+from database import async_writer
+from database.db_operations import close_time_db
+import adafruit_fingerprint
 import atexit
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 
 # =================== MAIN SYSTEM FUNCTIONS ===================
 
@@ -21,21 +25,27 @@ def initialize_system():
     display_separator()
     
     try:
+        # Load and warm the helmet model (then Tesseract) while the hardware checks below run
+        warmup = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-warmup")
+        helmet_warmup = warmup.submit(warmup_helmet_model)
+        warmup.submit(warmup_ocr)
+        warmup.shutdown(wait=False)
+        
+        # Open the RPi Camera 3 and let it settle (AE/AWB/AF) while the other components are checked
+        camera_startup = ThreadPoolExecutor(max_workers=1, thread_name_prefix="camera-init")
+        camera_init = camera_startup.submit(get_camera)
+        camera_startup.shutdown(wait=False)
+        
         # Initialize LED system
         print("💡 Initializing system components...")
         led_ok = init_led_system(red_pin=18, green_pin=16)
         
-        # Initialize RPi Camera 3
-        camera = get_camera()
-        camera_ok = camera.initialized and camera.test_camera()
-        
         # Test fingerprint sensor
         finger_ok = finger.verify_password() == adafruit_fingerprint.OK
         finger_count = 0
         if finger_ok:
             # Get actual enrolled count from fingerprint database
             try:
-                from services.fingerprint import load_fingerprint_database
                 fingerprint_db = load_fingerprint_database()
                 finger_count = len(fingerprint_db)
             except:
@@ -46,10 +56,13 @@ def initialize_system():
         # Initialize databases
         time_db_ok = init_time_database()
         
+        # Collect the RPi Camera 3 opened in the background
+        camera = camera_init.result()
+        camera_ok = camera.initialized and camera.test_camera()
+        
         # Test student database
         student_count = 0
         try:
-            import sqlite3
             conn = sqlite3.connect("database/students.db")
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM students")
@@ -61,7 +74,8 @@ def initialize_system():
         
         # Test helmet detection model
         try:
-            helmet_model_ok = session is not None
+            helmet_warmup.result()
+            helmet_model_ok = get_helmet_session() is not None
         except:
             helmet_model_ok = False
         
@@ -121,6 +135,8 @@ def main_system():
 
 def cleanup_system():
     """Cleanup all system resources"""
+    async_writer.flush()
+    close_time_db()
     cleanup_led_system()
     release_camera()
 
@@ -6,13 +6,20 @@ import adafruit_fingerprint
 import json
 import os
 import sqlite3
-import tkinter as tk
-from tkinter import simpledialog, messagebox
+from utils.gui_helpers import show_message_gui
+from services.time_tracker import get_student_time_status, record_time_in, record_time_out, normalize_name
+from database.db_operations import time_db
+from utils.time_helpers import date_time_now
 
 # =================== FINGERPRINT SETUP ===================
 uart = serial.Serial("/dev/ttyS0", baudrate=57600, timeout=1)
 finger = adafruit_fingerprint.Adafruit_Fingerprint(uart)
 
+# The sensor only answers commands, so waiting means polling; pace it instead of spinning the UART
+FINGER_POLL_INTERVAL = 0.05  # seconds between get_image() polls
+
+_INFO_SEP = "=" * 50  # Console banner rule, built once
+
 # =================== DATA STORAGE ===================
 FINGERPRINT_DATA_FILE = "json_folder/fingerprint_database.json"
 STUDENT_DB_FILE = "database/students.db"
@@ -74,6 +81,7 @@ def init_time_database():
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 student_id TEXT NOT NULL,
                 student_name TEXT NOT NULL,
+                student_name_norm TEXT,
                 date TEXT NOT NULL,
                 time TEXT NOT NULL,
                 status TEXT NOT NULL,
@@ -90,80 +98,22 @@ def init_time_database():
             )
         ''')
         
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.Error:
-        return False
-
-def get_student_time_status(student_id):
-    """Get current time status of student (IN/OUT)"""
-    try:
-        conn = sqlite3.connect(TIME_TRACKING_DB)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT current_status FROM current_status 
-            WHERE student_id = ?
-        ''', (student_id,))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        return result[0] if result else 'OUT'
-        
-    except sqlite3.Error:
-        return 'OUT'
-
-def record_time_in(student_info):
-    """Record student time in"""
-    try:
-        conn = sqlite3.connect(TIME_TRACKING_DB)
-        cursor = conn.cursor()
-        
-        current_date = time.strftime('%Y-%m-%d')
-        current_time = time.strftime('%H:%M:%S')
-        
-        cursor.execute('''
-            INSERT INTO time_records (student_id, student_name, date, time, status)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (student_info['student_id'], student_info['name'], current_date, current_time, 'IN'))
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO current_status (student_id, student_name, current_status)
-            VALUES (?, ?, ?)
-        ''', (student_info['student_id'], student_info['name'], 'IN'))
+        # Normalized names are stored once at insert so name matching never calls upper() per row
+        cursor.execute('PRAGMA table_info(time_records)')
+        if 'student_name_norm' not in {column[1] for column in cursor.fetchall()}:
+            cursor.execute('ALTER TABLE time_records ADD COLUMN student_name_norm TEXT')
+            # One-time backfill with normalize_name itself: SQLite's UPPER/TRIM only handle ASCII letters and spaces
+            cursor.execute('SELECT id, student_name FROM time_records')
+            cursor.executemany('UPDATE time_records SET student_name_norm = ? WHERE id = ?',
+                               [(normalize_name(name), row_id) for row_id, name in cursor.fetchall()])
+        # The guest lookup scans every GUEST_ record, so a name index was never used; it only slowed inserts
+        cursor.execute('DROP INDEX IF EXISTS idx_time_records_name_norm')
+        # Rowids are ordered within each student_id, so the latest-status lookup is one index seek
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_time_records_student_id ON time_records(student_id)')
         
         conn.commit()
         conn.close()
         return True
-        
-    except sqlite3.Error:
-        return False
-
-def record_time_out(student_info):
-    """Record student time out"""
-    try:
-        conn = sqlite3.connect(TIME_TRACKING_DB)
-        cursor = conn.cursor()
-        
-        current_date = time.strftime('%Y-%m-%d')
-        current_time = time.strftime('%H:%M:%S')
-        
-        cursor.execute('''
-            INSERT INTO time_records (student_id, student_name, date, time, status)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (student_info['student_id'], student_info['name'], current_date, current_time, 'OUT'))
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO current_status (student_id, student_name, current_status)
-            VALUES (?, ?, ?)
-        ''', (student_info['student_id'], student_info['name'], 'OUT'))
-        
-        conn.commit()
-        conn.close()
-        return True
-        
     except sqlite3.Error:
         return False
 
@@ -171,31 +121,31 @@ def record_time_attendance(student_info):
     """Automatically record time attendance based on current status"""
     current_status = get_student_time_status(student_info['student_id'])
     
-    if current_status == 'OUT' or current_status is None:
-        if record_time_in(student_info):
-            return f"🟢 TIME IN recorded for {student_info['name']} at {time.strftime('%H:%M:%S')}"
+    stamp = date_time_now()
+    
+    if current_status in (None, 'OUT'):
+        if record_time_in(student_info, stamp):
+            return f"🟢 TIME IN recorded for {student_info['name']} at {stamp[1]}"
         else:
             return "❌ Failed to record TIME IN"
     else:
-        if record_time_out(student_info):
-            return f"🔴 TIME OUT recorded for {student_info['name']} at {time.strftime('%H:%M:%S')}"
+        if record_time_out(student_info, stamp):
+            return f"🔴 TIME OUT recorded for {student_info['name']} at {stamp[1]}"
         else:
             return "❌ Failed to record TIME OUT"
 
 def get_all_time_records():
     """Get all time records from database"""
     try:
-        conn = sqlite3.connect(TIME_TRACKING_DB)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT student_id, student_name, date, time, status, timestamp
-            FROM time_records
-            ORDER BY timestamp DESC
-        ''')
+        with time_db() as conn:
+            rows = conn.execute('''
+                SELECT student_id, student_name, date, time, status, timestamp
+                FROM time_records
+                ORDER BY timestamp DESC
+            ''').fetchall()
         
         records = []
-        for row in cursor.fetchall():
+        for row in rows:
             records.append({
                 'student_id': row[0],
                 'student_name': row[1],
@@ -205,7 +155,6 @@ def get_all_time_records():
                 'timestamp': row[5]
             })
         
-        conn.close()
         return records
         
     except sqlite3.Error:
@@ -214,14 +163,9 @@ def get_all_time_records():
 def clear_all_time_records():
     """Clear all time records from database"""
     try:
-        conn = sqlite3.connect(TIME_TRACKING_DB)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM time_records')
-        cursor.execute('DELETE FROM current_status')
-        
-        conn.commit()
-        conn.close()
+        with time_db() as conn, conn:
+            conn.execute('DELETE FROM time_records')
+            conn.execute('DELETE FROM current_status')
         return True
         
     except sqlite3.Error:
@@ -230,25 +174,22 @@ def clear_all_time_records():
 def get_students_currently_in():
     """Get list of students currently timed in"""
     try:
-        conn = sqlite3.connect(TIME_TRACKING_DB)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT student_id, student_name, last_update
-            FROM current_status
-            WHERE current_status = 'IN'
-            ORDER BY last_update DESC
-        ''')
+        with time_db() as conn:
+            rows = conn.execute('''
+                SELECT student_id, student_name, last_update
+                FROM current_status
+                WHERE current_status = 'IN'
+                ORDER BY last_update DESC
+            ''').fetchall()
         
         students = []
-        for row in cursor.fetchall():
+        for row in rows:
             students.append({
                 'student_id': row[0],
                 'student_name': row[1],
                 'time_in': row[2]
             })
         
-        conn.close()
         return students
         
     except sqlite3.Error:
@@ -258,6 +199,9 @@ def get_students_currently_in():
 
 def get_student_id_gui():
     """Get student ID via GUI and fetch student information"""
+    import tkinter as tk
+    from tkinter import simpledialog, messagebox
+    
     root = tk.Tk()
     root.withdraw()
     
@@ -302,24 +246,17 @@ Proceed with fingerprint enrollment for this student?
                 root.destroy()
                 return None
 
-def show_message_gui(title, message):
-    """Show message dialog"""
-    root = tk.Tk()
-    root.withdraw()
-    messagebox.showinfo(title, message)
-    root.destroy()
-
 def display_student_info(student_info):
     """Display student information in console"""
-    print("\n" + "="*50)
-    print("📋 STUDENT INFORMATION")
-    print("="*50)
-    print(f"👤 Full Name: {student_info['full_name']}")
-    print(f"🆔 Student No.: {student_info['student_id']}")
-    print(f"📚 Course: {student_info['course']}")
-    print(f"🪪 License Number: {student_info['license_number']}")
-    print(f"📅 License Expiration: {student_info['expiration_date']}")
-    print("="*50)
+    print(f"\n{_INFO_SEP}\n"
+          "📋 STUDENT INFORMATION\n"
+          f"{_INFO_SEP}\n"
+          f"👤 Full Name: {student_info['full_name']}\n"
+          f"🆔 Student No.: {student_info['student_id']}\n"
+          f"📚 Course: {student_info['course']}\n"
+          f"🪪 License Number: {student_info['license_number']}\n"
+          f"📅 License Expiration: {student_info['expiration_date']}\n"
+          f"{_INFO_SEP}")
 
 # =================== ENHANCED FINGERPRINT FUNCTIONS ===================
 
@@ -349,6 +286,7 @@ def enroll_finger_with_student_info(location):
                 break
             if i == adafruit_fingerprint.NOFINGER:
                 print(".", end="")
+                time.sleep(FINGER_POLL_INTERVAL)
             elif i == adafruit_fingerprint.IMAGEFAIL:
                 print("❌ Imaging error")
                 return False
@@ -375,6 +313,7 @@ def enroll_finger_with_student_info(location):
             print("✋ Remove finger")
             time.sleep(1)
             while i != adafruit_fingerprint.NOFINGER:
+                time.sleep(FINGER_POLL_INTERVAL)
                 i = finger.get_image()
 
     print("🗝️ Creating model...", end="")
@@ -393,7 +332,8 @@ def enroll_finger_with_student_info(location):
     if i == adafruit_fingerprint.OK:
         print("✅")
         
-        # Save student information
+        # Save student information (clock read once; the record and the message show the same time)
+        enrolled_date = " ".join(date_time_now())
         database = load_fingerprint_database()
         database[str(location)] = {
             "name": student_info['full_name'],
@@ -401,7 +341,7 @@ def enroll_finger_with_student_info(location):
             "course": student_info['course'],
             "license_number": student_info['license_number'],
             "license_expiration": student_info['expiration_date'],
-            "enrolled_date": time.strftime("%Y-%m-%d %H:%M:%S")
+            "enrolled_date": enrolled_date
         }
         save_fingerprint_database(database)
         
@@ -415,7 +355,7 @@ Enrollment Successful! ✅
 📚 Course: {student_info['course']}
 🪪 License: {student_info['license_number']}
 🔒 Fingerprint Slot: #{location}
-📅 Enrolled: {time.strftime("%Y-%m-%d %H:%M:%S")}
+📅 Enrolled: {enrolled_date}
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
         """
         
@@ -430,12 +370,27 @@ Enrollment Successful! ✅
             print("❌ Other error")
         return False
 
-def authenticate_fingerprint():
-    """Authenticate fingerprint and return complete student information"""
+def wait_for_finger(timeout=None, cancel=None):
+    """Poll the sensor until a finger image is captured; returns False if timeout (seconds) expires or cancel is set first"""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while finger.get_image() != adafruit_fingerprint.OK:
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+        if cancel is None:
+            time.sleep(FINGER_POLL_INTERVAL)
+        elif cancel.wait(FINGER_POLL_INTERVAL):
+            return False
+    return True
+
+def authenticate_fingerprint(cancel=None):
+    """Authenticate fingerprint and return complete student information (None if cancel is set while waiting)"""
     print("\n🔒 Please place your finger on the sensor for authentication...")
     
-    while finger.get_image() != adafruit_fingerprint.OK:
-        pass
+    # Read the enrollment records before the wait, so the lookup is ready the moment a finger matches
+    database = load_fingerprint_database()
+    
+    if not wait_for_finger(cancel=cancel):
+        return None
     
     print("🔄 Processing fingerprint...")
     if finger.image_2_tz(1) != adafruit_fingerprint.OK:
@@ -447,19 +402,12 @@ def authenticate_fingerprint():
         print("❌ No matching fingerprint found")
         return None
     
-    database = load_fingerprint_database()
     finger_id = str(finger.finger_id)
     
     if finger_id in database:
         student_info = database[finger_id]
-        print(f"✅ Authentication successful!")
-        print(f"👤 Welcome: {student_info['name']}")
-        print(f"🆔 Student ID: {student_info.get('student_id', 'N/A')}")
-        print(f"📚 Course: {student_info.get('course', 'N/A')}")
-        print(f"🪪 License: {student_info.get('license_number', 'N/A')}")
-        print(f"🎯 Confidence: {finger.confidence}")
-        
-        return {
+        # Built once; the prints below and every downstream step share this dict
+        auth_info = {
             "name": student_info['name'],
             "student_id": student_info.get('student_id', 'N/A'),
             "course": student_info.get('course', 'N/A'),
@@ -469,6 +417,15 @@ def authenticate_fingerprint():
             "confidence": finger.confidence,
             "enrolled_date": student_info.get('enrolled_date', 'Unknown')
         }
+        
+        print(f"✅ Authentication successful!\n"
+              f"👤 Welcome: {auth_info['name']}\n"
+              f"🆔 Student ID: {auth_info['student_id']}\n"
+              f"📚 Course: {auth_info['course']}\n"
+              f"🪪 License: {auth_info['license_number']}\n"
+              f"🎯 Confidence: {auth_info['confidence']}")
+        
+        return auth_info
     else:
         print(f"⚠️ Fingerprint recognized (ID: {finger.finger_id}) but no student data found")
         return {
@@ -4,6 +4,9 @@ import cv2
 import numpy as np
 import onnxruntime as ort
 import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from services.rpi_camera import get_camera
 
 # === Helmet Detection Config ===
@@ -12,16 +15,39 @@ CONF_THRESHOLD = 0.4
 INPUT_SIZE = 320
 HELMET_DETECTION_DURATION = 2  # seconds to detect helmet
 CLASS_NAMES = ["Nutshell", "full-face helmet"]
+HELMET_CACHE_TTL = 10  # seconds a successful verification stays reusable
+HELMET_CACHE_MAX_DISTANCE = 2  # dHash bits that may differ for the scene to count as unchanged (sensor noise only)
 
-# === Load ONNX model ===
-try:
-    session = ort.InferenceSession(MODEL_PATH, providers=["CPUExecutionProvider"])
-    input_name = session.get_inputs()[0].name
-    print("✅ Helmet detection model loaded successfully")
-except Exception as e:
-    print(f"❌ Failed to load helmet detection model: {e}")
-    session = None
-    input_name = None
+# Per-frame progress goes here instead of stdout; it is already drawn on the preview window
+logger = logging.getLogger(__name__)
+
+# === ONNX model (loaded on first use, not at import) ===
+_session = None
+_input_name = None
+_session_loaded = False
+_session_lock = threading.Lock()
+
+def get_helmet_session():
+    """Load the ONNX model once and return the shared session (None if it failed to load)"""
+    global _session, _input_name, _session_loaded
+    with _session_lock:
+        if not _session_loaded:
+            try:
+                _session = ort.InferenceSession(MODEL_PATH, providers=["CPUExecutionProvider"])
+                _input_name = _session.get_inputs()[0].name
+                print("✅ Helmet detection model loaded successfully")
+            except Exception as e:
+                print(f"❌ Failed to load helmet detection model: {e}")
+                _session = None
+            _session_loaded = True
+    return _session
+
+# onnxruntime releases the GIL inside session.run, so inference on this thread
+# overlaps with the next camera capture on the caller's thread
+_inference_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="helmet-infer")
+
+# (dhash, time.monotonic()) of the scene at the last successful verification
+_last_verified = None
 
 def preprocess_helmet(frame):
     """Preprocess frame for helmet detection"""
@@ -71,9 +97,43 @@ def postprocess_helmet(predictions, scale, orig_size):
 
     return result
 
+def detect_helmets(frame):
+    """Run helmet detection on a single frame"""
+    blob, scale, orig_size = preprocess_helmet(frame)
+    predictions = get_helmet_session().run(None, {_input_name: blob})[0]
+    return postprocess_helmet(predictions[0], scale, orig_size)
+
+def warmup_helmet_model():
+    """Run one dummy inference so the first real frame skips ONNX Runtime's lazy setup"""
+    session = get_helmet_session()
+    if session is None:
+        return
+    session.run(None, {_input_name: np.zeros((1, 3, INPUT_SIZE, INPUT_SIZE), dtype=np.float32)})
+
+def frame_dhash(frame):
+    """64-bit difference hash of a frame (perceptual, tolerant of sensor noise)"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(small[:, 1:] > small[:, :-1]).tobytes(), "big")
+
+def _recently_verified(frame):
+    """True if a helmet was verified within HELMET_CACHE_TTL on a near-identical scene"""
+    if _last_verified is None or frame is None:
+        return False
+    dhash, verified_at = _last_verified
+    if time.monotonic() - verified_at > HELMET_CACHE_TTL:
+        return False
+    return bin(frame_dhash(frame) ^ dhash).count("1") <= HELMET_CACHE_MAX_DISTANCE
+
+def clear_helmet_cache():
+    """Forget the last successful verification (once a flow has moved past the person it was for)"""
+    global _last_verified
+    _last_verified = None
+
 def verify_helmet():
     """Verify full-face helmet using RPi Camera 3"""
-    if session is None:
+    global _last_verified
+    if get_helmet_session() is None:
         print("❌ Helmet detection model not loaded")
         return False
     
@@ -92,6 +152,13 @@ def verify_helmet():
     consecutive_detections = 0
     required_consecutive = 5  # Require 5 consecutive detections for stability
     
+    next_frame = camera.get_frame()
+    
+    # Back-to-back attempts (e.g. retry after a failed fingerprint) skip the model, and the window
+    if _recently_verified(next_frame):
+        print("⚡ Helmet verified moments ago on the same scene - skipping detection")
+        return True
+    
     print("🔍 Helmet detection started... Please show your full-face helmet to the camera")
     
     # Create window
@@ -99,14 +166,14 @@ def verify_helmet():
     cv2.resizeWindow("Helmet Verification", 800, 600)
     
     frame_count = 0
-    last_frame_time = time.time()
+    last_frame_time = time.monotonic()
     
     try:
         while True:
-            current_time = time.time()
+            current_time = time.monotonic()
             
-            # Get frame from RPi camera
-            frame = camera.get_frame()
+            # Frame captured while the previous one was being inferred
+            frame = next_frame
             
             if frame is None:
                 print("❌ Failed to capture frame from RPi camera")
@@ -121,15 +188,17 @@ def verify_helmet():
                 key = cv2.waitKey(1000) & 0xFF  # Wait 1 second
                 if key == ord('q') or key == 27:
                     break
+                next_frame = camera.get_frame()
                 continue
             
             frame_count += 1
             
-            # Process frame for helmet detection
+            # Infer on the worker thread while the next frame is captured
+            pending = _inference_worker.submit(detect_helmets, frame)
+            next_frame = camera.get_frame()
+            
             try:
-                blob, scale, orig_size = preprocess_helmet(frame)
-                predictions = session.run(None, {input_name: blob})[0]
-                detections = postprocess_helmet(predictions[0], scale, orig_size)
+                detections = pending.result()
             except Exception as e:
                 print(f"❌ Error in helmet detection: {e}")
                 detections = []
@@ -187,10 +256,12 @@ def verify_helmet():
                     cv2.putText(frame, progress_text, (text_x, progress_y + 95),
                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
                     
-                    print(f"⏱️ Helmet verified for {elapsed:.1f}/{HELMET_DETECTION_DURATION} seconds")
+                    logger.debug("Helmet verified for %.1f/%s seconds", elapsed, HELMET_DETECTION_DURATION)
                     
                     if elapsed >= HELMET_DETECTION_DURATION:
                         print("✅ Helmet verification successful!")
+                        if next_frame is not None:
+                            _last_verified = (frame_dhash(next_frame), time.monotonic())
                         
                         # Show success message for 2 seconds
                         success_frame = frame.copy()
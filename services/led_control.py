@@ -23,20 +23,20 @@ class LEDController:
         """
         self.red_pin = red_pin
         self.green_pin = green_pin
+        self.pins = (red_pin, green_pin)  # Both LEDs are driven in one GPIO.output call
         self.blink_interval = blink_interval
         
         self.current_state = LEDState.OFF
         self.blink_thread = None
         self.stop_blink = threading.Event()
         
-        # Setup GPIO
+        # Setup GPIO with LEDs initialized to OFF
         GPIO.setmode(GPIO.BCM)
-        GPIO.setup(self.red_pin, GPIO.OUT)
-        GPIO.setup(self.green_pin, GPIO.OUT)
-        
-        # Initialize LEDs to OFF
-        GPIO.output(self.red_pin, GPIO.LOW)
-        GPIO.output(self.green_pin, GPIO.LOW)
+        GPIO.setup(self.pins, GPIO.OUT, initial=GPIO.LOW)
+    
+    def _write(self, red, green):
+        """Drive both LED pins in a single GPIO call"""
+        GPIO.output(self.pins, (red, green))
     
     def _blink_red(self):
         """Internal method to handle red LED blinking"""
@@ -59,6 +59,11 @@ class LEDController:
             state (LEDState): Target LED state
             duration (float, optional): Auto-return to idle after duration (seconds)
         """
+        # Pins are already driven for this state; skip the GPIO writes and blink thread restart
+        if state == self.current_state and not duration:
+            if state != LEDState.IDLE or (self.blink_thread and self.blink_thread.is_alive()):
+                return
+        
         # Stop any ongoing blinking
         self.stop_blink.set()
         if self.blink_thread and self.blink_thread.is_alive():
@@ -75,18 +80,15 @@ class LEDController:
             
         elif state == LEDState.PROCESSING:
             # Solid red
-            GPIO.output(self.red_pin, GPIO.HIGH)
-            GPIO.output(self.green_pin, GPIO.LOW)
+            self._write(GPIO.HIGH, GPIO.LOW)
             
         elif state == LEDState.SUCCESS:
             # Solid green
-            GPIO.output(self.red_pin, GPIO.LOW)
-            GPIO.output(self.green_pin, GPIO.HIGH)
+            self._write(GPIO.LOW, GPIO.HIGH)
             
         elif state == LEDState.OFF:
             # All off
-            GPIO.output(self.red_pin, GPIO.LOW)
-            GPIO.output(self.green_pin, GPIO.LOW)
+            self._write(GPIO.LOW, GPIO.LOW)
         
         # Auto-return to idle after duration
         if duration and state != LEDState.IDLE:
@@ -103,9 +105,8 @@ class LEDController:
         if self.blink_thread and self.blink_thread.is_alive():
             self.blink_thread.join(timeout=1.0)
         
-        GPIO.output(self.red_pin, GPIO.LOW)
-        GPIO.output(self.green_pin, GPIO.LOW)
-        GPIO.cleanup([self.red_pin, self.green_pin])
+        self._write(GPIO.LOW, GPIO.LOW)
+        GPIO.cleanup(self.pins)
 
 # Global LED controller instance
 led_controller = None
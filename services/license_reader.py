@@ -1,5 +1,11 @@
 # services/license_reader.py - Philippine Driver's License OCR System - Updated for RPi Camera 3
 
+import os
+
+# Tesseract's OpenMP threading is slower than single-threaded on the Pi's cores;
+# tesseract subprocesses inherit this limit
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
 import cv2
 import numpy as np
 import pytesseract
@@ -8,9 +14,17 @@ import difflib
 from typing import Dict, List
 from dataclasses import dataclass
 from services.rpi_camera import get_camera
-import os
+import itertools
+import threading
+from functools import lru_cache
 from datetime import datetime
 
+try:
+    from tesserocr import PyTessBaseAPI, OEM, PSM
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
 # ============== DATA STRUCTURES & CONFIGURATION ==============
 
 VERIFICATION_KEYWORDS = [
@@ -21,6 +35,33 @@ VERIFICATION_KEYWORDS = [
     "Expiration Date"
 ]
 
+# Looser license indicators used for guest verification
+LICENSE_INDICATORS = [
+    "LICENSE", "DRIVER", "REPUBLIC", "PHILIPPINES", 
+    "TRANSPORTATION", "EXPIRATION", "DATE OF BIRTH"
+]
+
+DEFAULT_OCR_CONFIG = '--psm 11 --oem 3'
+OCR_MAX_EDGE = 1200  # Longest image edge handed to Tesseract; printed ID text stays legible
+
+# Latest capture's frame keyed by its capture name; captures are never written to disk, OCR reads the array
+_captured_frames = {}
+_capture_ids = itertools.count(1)  # Keeps capture names unique within the same second
+
+# Precompiled text patterns (compiled once at import instead of looked up per line)
+_DISPLAY_SANITIZE_RE = re.compile(r"[^a-zA-Z0-9\s,\.]")
+_NAME_CHARS_RE = re.compile(r"[^A-Z\s,.]")
+_DATE_PATTERN_RE = re.compile(r'\d{2}[-/]\d{2}[-/]\d{4}|\d{1,2}[-/]\d{1,2}[-/]\d{2,4}')
+_LICENSE_NUMBER_RE = re.compile(r'[A-Z]\d{2}-\d{2}-\d{6}|[A-Z]\d{8}|\d{10}')
+
+def _keyword_pattern(keywords: List[str]) -> re.Pattern:
+    """Single-scan pattern whose findall() yields every keyword occurrence, overlapping ones included"""
+    alternation = '|'.join(map(re.escape, sorted(keywords, key=len, reverse=True)))
+    return re.compile(f'(?=({alternation}))')
+
+_VERIFICATION_KEYWORD_RE = _keyword_pattern(VERIFICATION_KEYWORDS)
+_LICENSE_INDICATOR_RE = _keyword_pattern(LICENSE_INDICATORS)
+
 @dataclass
 class NameInfo:
     """Data structure for license verification results"""
@@ -29,16 +70,35 @@ class NameInfo:
     document_verified: str
     formatted_text: str
     fingerprint_info: dict = None
+    match_score: float = None  # Best OCR line similarity to the reference name (licenseRead only)
+    license_detected: bool = False  # Keyword check passed; document_verified is its display text
 
 # ============== IMAGE PREPROCESSING FUNCTIONS ==============
 
-def preprocess_image(image_path: str) -> np.ndarray:
-    """Apply comprehensive image preprocessing for OCR optimization"""
-    img = cv2.imread(image_path)
-    if img is None:
+def load_image(image_path: str) -> np.ndarray:
+    """Get a capture as a BGR array, from memory when it is the frame just captured"""
+    frame = _captured_frames.get(image_path)
+    return cv2.imread(image_path) if frame is None else frame
+
+def load_gray_image(image_path: str) -> np.ndarray:
+    """Read an image as single-channel 8-bit, downscaled so its long edge is at most OCR_MAX_EDGE"""
+    frame = _captured_frames.get(image_path)
+    if frame is None:
+        gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    else:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if gray is None:
         raise Exception(f"Could not read image at {image_path}")
     
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    scale = OCR_MAX_EDGE / max(h, w)
+    if scale < 1:
+        gray = cv2.resize(gray, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    return gray
+
+def preprocess_image(image_path: str) -> np.ndarray:
+    """Apply comprehensive image preprocessing for OCR optimization"""
+    gray = load_gray_image(image_path)
     clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
     equalized = clahe.apply(gray)
     bilateral = cv2.bilateralFilter(equalized, 9, 75, 75)
@@ -58,11 +118,7 @@ def enhance_image(image: np.ndarray) -> np.ndarray:
 
 def preprocess_batch(image_path: str) -> List[np.ndarray]:
     """Generate multiple preprocessed versions for better OCR accuracy"""
-    img = cv2.imread(image_path)
-    if img is None:
-        raise Exception(f"Could not read image at {image_path}")
-    
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    gray = load_gray_image(image_path)
     processed_images = []
     
     # Standard OTSU thresholding
@@ -85,22 +141,68 @@ def preprocess_batch(image_path: str) -> List[np.ndarray]:
 
 # ============== OCR TEXT EXTRACTION ==============
 
-def extract_text_from_image(image_path: str, config: str = '--psm 11 --oem 3') -> str:
-    """Extract text from license image using optimized OCR"""
+# Persistent Tesseract handle (tesserocr) so the LSTM model is loaded once, not per call
+_tess_api = None
+_tess_lock = threading.Lock()
+
+def _get_tess_api():
+    """Get the shared PyTessBaseAPI instance, creating it on first use"""
+    global _tess_api
+    if _tess_api is None:
+        _tess_api = PyTessBaseAPI(lang='eng', oem=OEM.DEFAULT, psm=PSM.SPARSE_TEXT)
+    return _tess_api
+
+def _ocr_with_api(image: np.ndarray) -> str:
+    """Run OCR on a grayscale image through the persistent tesserocr handle (equivalent to DEFAULT_OCR_CONFIG)"""
+    image = np.ascontiguousarray(image)
+    h, w = image.shape
+    with _tess_lock:
+        api = _get_tess_api()
+        api.SetImageBytes(image.tobytes(), w, h, 1, w)
+        return api.GetUTF8Text()
+
+@lru_cache(maxsize=8)
+def _extract_text_cached(image_path: str, config: str) -> str:
+    """Run Tesseract once per capture and config (capture names are unique, so the name is the key)"""
+    img = preprocess_image(image_path)
+    enhanced = enhance_image(img)
+    if TESSEROCR_AVAILABLE and config == DEFAULT_OCR_CONFIG:
+        return _ocr_with_api(enhanced)
+    return pytesseract.image_to_string(enhanced, config=config)
+
+def extract_text_from_image(image_path: str, config: str = DEFAULT_OCR_CONFIG) -> str:
+    """Extract text from license image using optimized OCR (memoized per capture)"""
     try:
-        img = preprocess_image(image_path)
-        enhanced = enhance_image(img)
-        return pytesseract.image_to_string(enhanced, config=config)
+        return _extract_text_cached(image_path, config)
     except Exception as e:
         return f"Error extracting text: {str(e)}"
 
+def warmup_ocr() -> bool:
+    """Run a throwaway Tesseract pass so its language data is paged in before real OCR"""
+    try:
+        blank = np.full((32, 32), 255, dtype=np.uint8)
+        if TESSEROCR_AVAILABLE:
+            _ocr_with_api(blank)
+        pytesseract.image_to_string(blank, config='--psm 6 --oem 3')
+        return True
+    except Exception:
+        return False
+
+def split_ocr_lines(raw_text: str) -> tuple:
+    """Split OCR output into stripped, non-empty lines (one strip per line)"""
+    return tuple(clean for line in raw_text.splitlines() if (clean := line.strip()))
+
 def find_best_line_match(input_name: str, ocr_text: List[str]) -> tuple:
     """Find the best matching line in OCR text for the given name"""
     best_match, best_score = None, 0.0
 
+    # One matcher with the name lowered once; only the OCR line changes per iteration
+    matcher = difflib.SequenceMatcher(None, input_name.lower())
+
     for line in ocr_text:
         line_clean = line.strip()
-        score = difflib.SequenceMatcher(None, input_name.lower(), line_clean.lower()).ratio()
+        matcher.set_seq2(line_clean.lower())
+        score = matcher.ratio()
         if score > best_score:
             best_score = score
             best_match = line_clean
@@ -113,7 +215,7 @@ def format_text_output(raw_text: str) -> str:
     cleaned = []
     for line in lines:
         line = line.strip()
-        sanitized = re.sub(r"[^a-zA-Z0-9\s,\.]", "", line)
+        sanitized = _DISPLAY_SANITIZE_RE.sub("", line)
         if len(sanitized) >= 3 and any(c.isalpha() for c in sanitized):
             cleaned.append(sanitized)
     return "\n".join(cleaned)
@@ -135,15 +237,15 @@ def extract_name_from_lines(image_path: str, reference_name: str = "",
             best_text = text
             max_length = len(text)
 
-    raw_text = best_text if max_length >= 50 else pytesseract.image_to_string(cv2.imread(image_path))
+    raw_text = best_text if max_length >= 50 else pytesseract.image_to_string(load_image(image_path))
     full_text = " ".join(raw_text.splitlines()).upper()
 
     # Verify document authenticity
-    matched_keywords = {kw for kw in VERIFICATION_KEYWORDS if kw in full_text}
+    matched_keywords = set(_VERIFICATION_KEYWORD_RE.findall(full_text))
     is_verified = len(matched_keywords) >= 2
     doc_status = "Driver's License Detected" if is_verified else "Unverified Document"
 
-    name_info = {}
+    name_info = {"License Detected": is_verified}
     
     # Priority 1: High confidence fingerprint match
     if reference_name and match_score >= 0.6:
@@ -166,10 +268,10 @@ def extract_name_from_lines(image_path: str, reference_name: str = "",
         return name_info
     
     # Priority 3: Pattern detection fallback
-    lines = [line.strip() for line in raw_text.splitlines() if line.strip()]
+    lines = split_ocr_lines(raw_text)
     
     for line in lines:
-        clean = re.sub(r"[^A-Z\s,.]", "", line.upper()).strip()
+        clean = _NAME_CHARS_RE.sub("", line.upper()).strip()
         
         if any(header in clean for header in VERIFICATION_KEYWORDS):
             continue
@@ -197,7 +299,8 @@ def package_name_info(structured_data: Dict[str, str], basic_text: str,
         name=structured_data.get('Name', 'Not Found'),
         document_verified=structured_data.get('Document Verified', 'Unverified'),
         formatted_text=format_text_output(basic_text),
-        fingerprint_info=fingerprint_info
+        fingerprint_info=fingerprint_info,
+        license_detected=structured_data.get('License Detected', False)
     )
 
 # ============== RPi CAMERA 3 LICENSE CAPTURE ==============
@@ -211,13 +314,14 @@ def auto_capture_license_rpi(reference_name="", fingerprint_info=None):
         print("❌ RPi Camera not initialized")
         return None
     
-    # Create a temporary filename for processing (but won't actually save)
+    # Name for the capture (nothing is saved; OCR looks the frame up by this name)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    capture_id = next(_capture_ids)
     
     if fingerprint_info and 'student_id' in fingerprint_info:
-        temp_filename = f"temp_license_{fingerprint_info['student_id']}_{timestamp}.jpg"
+        temp_filename = f"temp_license_{fingerprint_info['student_id']}_{timestamp}_{capture_id}.jpg"
     else:
-        temp_filename = f"temp_license_{timestamp}.jpg"
+        temp_filename = f"temp_license_{timestamp}_{capture_id}.jpg"
     
     print("📷 Using Raspberry Pi Camera 3")
     print(f"📱 Target: {reference_name}" if reference_name else "📱 Guest License Capture")
@@ -317,12 +421,12 @@ def auto_capture_license_rpi(reference_name="", fingerprint_info=None):
         
         cv2.destroyAllWindows()
         
-        # Create a temporary file for OCR processing only
+        # Keep the frame in memory for OCR processing only
         if captured_frame is not None:
-            # Save temporarily just for OCR, then delete immediately
-            cv2.imwrite(temp_filename, captured_frame)
-            print(f"✅ License captured (temp processing file: {temp_filename})")
-            return temp_filename  # Return the temp filename for OCR processing
+            _captured_frames.clear()
+            _captured_frames[temp_filename] = captured_frame
+            print(f"✅ License captured ({temp_filename})")
+            return temp_filename  # Return the capture name for OCR processing
         else:
             return None
             
@@ -332,74 +436,70 @@ def auto_capture_license_rpi(reference_name="", fingerprint_info=None):
         return None
 
 def cleanup_temp_file(temp_filename):
-    """Delete temporary file after OCR processing"""
-    try:
-        if temp_filename and os.path.exists(temp_filename):
-            os.remove(temp_filename)
-            print(f"🗑️ Temporary file cleaned up: {temp_filename}")
-    except Exception as e:
-        print(f"⚠️ Could not delete temp file: {e}")
-    
+    """Release the in-memory capture after OCR processing"""
+    if temp_filename:
+        _captured_frames.pop(temp_filename, None)
+        print(f"🗑️ Released capture: {temp_filename}")
+
 
 # ============== MAIN LICENSE READING FUNCTIONS ==============
 
-def licenseRead(image_path: str, fingerprint_info: dict):
-    """Process license with fingerprint authentication"""
+def licenseRead(image_path: str, fingerprint_info: dict, ocr_text: str = None):
+    """Process license with fingerprint authentication (reuses ocr_text when already extracted)"""
     reference_name = fingerprint_info['name']
 
-    basic_text = extract_text_from_image(image_path)
-    ocr_lines = [line.strip() for line in basic_text.splitlines() if line.strip()]
+    basic_text = ocr_text if ocr_text is not None else extract_text_from_image(image_path)
+    ocr_lines = split_ocr_lines(basic_text)
     name_from_ocr, sim_score = find_best_line_match(reference_name, ocr_lines)
 
     structured_data = extract_name_from_lines(image_path, reference_name=reference_name, 
                                             best_ocr_match=name_from_ocr, match_score=sim_score)
 
     packaged = package_name_info(structured_data, basic_text, fingerprint_info)
+    packaged.match_score = sim_score
 
     # Verification summary
     auth_success = fingerprint_info['confidence'] > 50
     license_match = sim_score > 0.5 if sim_score else False
     overall_status = "VERIFIED" if auth_success and license_match else "PARTIAL VERIFICATION"
     
-    print(f"\n===== MOTORPASS VERIFICATION SUMMARY =====")
-    print(f"Fingerprint Auth  : {fingerprint_info['name']} (ID: {fingerprint_info['finger_id']})")
-    print(f"Document Type     : {packaged.document_type}")
-    print(f"Detected Name     : {packaged.name}")
-    print(f"Verification      : {packaged.document_verified}")
+    # Summary is assembled first and written in one print
+    summary = [
+        "\n===== MOTORPASS VERIFICATION SUMMARY =====",
+        f"Fingerprint Auth  : {fingerprint_info['name']} (ID: {fingerprint_info['finger_id']})",
+        f"Document Type     : {packaged.document_type}",
+        f"Detected Name     : {packaged.name}",
+        f"Verification      : {packaged.document_verified}",
+    ]
     if "Match Confidence" in structured_data:
-        print(f"Match Confidence  : {structured_data['Match Confidence']}")
-    print(f"Overall Status    : {overall_status}")
-    print("==========================================\n")
+        summary.append(f"Match Confidence  : {structured_data['Match Confidence']}")
+    summary += [f"Overall Status    : {overall_status}", "==========================================\n"]
+    print("\n".join(summary))
     
     cleanup_temp_file(image_path)
     
     return packaged
     
-def licenseReadGuest(image_path: str, guest_info: dict):
+def licenseReadGuest(image_path: str, guest_info: dict, ocr_text: str = None):
     """Process license for guest verification (no fingerprint required) - IMPROVED VERSION"""
     guest_name = guest_info['name']
 
-    basic_text = extract_text_from_image(image_path)
+    basic_text = ocr_text if ocr_text is not None else extract_text_from_image(image_path)
     full_text = " ".join(basic_text.splitlines()).upper()
     
     # IMPROVED: More flexible document authenticity check
-    matched_keywords = {kw for kw in VERIFICATION_KEYWORDS if kw in full_text}
+    matched_keywords = set(_VERIFICATION_KEYWORD_RE.findall(full_text))
     
     # CHANGED: Reduced threshold from 2 to 1 keyword for guest verification
     # Also check for common license indicators
-    license_indicators = [
-        "LICENSE", "DRIVER", "REPUBLIC", "PHILIPPINES", 
-        "TRANSPORTATION", "EXPIRATION", "DATE OF BIRTH"
-    ]
-    
-    indicator_matches = sum(1 for indicator in license_indicators if indicator in full_text)
+    indicator_matches = len(set(_LICENSE_INDICATOR_RE.findall(full_text)))
     
     # More lenient verification: either 1 verification keyword OR 2 license indicators
     is_verified = len(matched_keywords) >= 1 or indicator_matches >= 2
     
     # Additional check: look for typical license patterns
-    has_date_pattern = bool(re.search(r'\d{2}[-/]\d{2}[-/]\d{4}|\d{1,2}[-/]\d{1,2}[-/]\d{2,4}', full_text))
-    has_license_number = bool(re.search(r'[A-Z]\d{2}-\d{2}-\d{6}|[A-Z]\d{8}|\d{10}', full_text))
+    has_date_pattern = bool(_DATE_PATTERN_RE.search(full_text))
+    has_license_number = bool(_LICENSE_NUMBER_RE.search(full_text))
     
     # Final verification decision
     if not is_verified:
@@ -418,22 +518,23 @@ def licenseReadGuest(image_path: str, guest_info: dict):
         name=guest_name,
         document_verified=structured_data["Document Verified"],
         formatted_text=format_text_output(basic_text),
-        fingerprint_info=None
+        fingerprint_info=None,
+        license_detected=is_verified
     )
 
     # IMPROVED: More positive guest verification summary
     overall_status = "VERIFIED" if is_verified else "DOCUMENT DETECTED"
     
-    print(f"\n===== MOTORPASS GUEST VERIFICATION SUMMARY =====")
-    print(f"Guest Name        : {guest_name}")
-    print(f"Plate Number      : {guest_info['plate_number']}")
-    print(f"Visiting          : {guest_info['office']}")
-    print(f"Document Type     : {packaged.document_type}")
-    print(f"Verification      : {packaged.document_verified}")
-    print(f"Keywords Found    : {len(matched_keywords)}")
-    print(f"Indicators Found  : {indicator_matches}")
-    print(f"Overall Status    : {overall_status}")
-    print("===============================================\n")
+    print(f"\n===== MOTORPASS GUEST VERIFICATION SUMMARY =====\n"
+          f"Guest Name        : {guest_name}\n"
+          f"Plate Number      : {guest_info['plate_number']}\n"
+          f"Visiting          : {guest_info['office']}\n"
+          f"Document Type     : {packaged.document_type}\n"
+          f"Verification      : {packaged.document_verified}\n"
+          f"Keywords Found    : {len(matched_keywords)}\n"
+          f"Indicators Found  : {indicator_matches}\n"
+          f"Overall Status    : {overall_status}\n"
+          "===============================================\n")
     
     cleanup_temp_file(image_path)
     
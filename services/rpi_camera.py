@@ -4,8 +4,9 @@ import cv2
 import numpy as np
 import time
 import os
+import threading
 from datetime import datetime
-from config import RPI_CAMERA_RESOLUTION, RPI_CAMERA_FRAMERATE, RPI_CAMERA_WARMUP_TIME, CAPTURE_QUALITY, CAPTURE_FORMAT
+from config import RPI_CAMERA_RESOLUTION, RPI_CAMERA_FRAMERATE, RPI_CAMERA_WARMUP_TIME, RPI_CAMERA_BUFFER_COUNT, CAPTURE_QUALITY, CAPTURE_FORMAT
 
 try:
     from picamera2 import Picamera2
@@ -13,6 +14,11 @@ try:
 except ImportError:
     RPI_CAMERA_AVAILABLE = False
 
+try:
+    from libcamera import controls
+except ImportError:
+    controls = None
+
 class RPiCameraService:
 	
     def __init__(self):
@@ -32,26 +38,28 @@ class RPiCameraService:
             
             self.camera = Picamera2()
             
-            # Use default configuration
+            # Default configuration, but with a short buffer ring and queue=False so every
+            # capture_array() returns a frame exposed after the request, not one waiting in the queue
             config = self.camera.create_preview_configuration(
-                main={"size": RPI_CAMERA_RESOLUTION}
+                main={"size": RPI_CAMERA_RESOLUTION},
+                buffer_count=RPI_CAMERA_BUFFER_COUNT,
+                queue=False
             )
             
             self.camera.configure(config)
-            self.camera.start()
-            time.sleep(RPI_CAMERA_WARMUP_TIME)
             
-            # Add auto-focus control silently
+            # Add auto-focus control silently; set before start so it converges during the warm-up below
             try:
-                from libcamera import controls
                 self.camera.set_controls({
                     "AfMode": controls.AfModeEnum.Continuous,
                     "AfSpeed": controls.AfSpeedEnum.Fast,
                 })
-                time.sleep(2)
             except Exception:
                 pass  # Ignore auto-focus errors silently
             
+            self.camera.start()
+            time.sleep(RPI_CAMERA_WARMUP_TIME)
+            
             self.initialized = True
             return True
             
@@ -84,10 +92,10 @@ class RPiCameraService:
             return False
         
         try:
-            from libcamera import controls
-            self.camera.set_controls({"AfTrigger": controls.AfTriggerEnum.Start})
-            time.sleep(1.5)
-            return True
+            # Blocks until the lens reports focused (or failed) instead of sleeping a fixed time
+            focused = self.camera.autofocus_cycle()
+            self.camera.set_controls({"AfMode": controls.AfModeEnum.Continuous})
+            return focused
         except Exception:
             return False
     
@@ -136,19 +144,22 @@ class RPiCameraService:
         """Destructor to ensure camera is released"""
         self.release()
 
-# Global camera instance - singleton pattern
+# Global camera instance - singleton pattern (locked so a background warm-up and a caller can't open it twice)
 _camera_instance = None
+_camera_lock = threading.Lock()
 
 def get_camera():
     """Get global camera instance (singleton)"""
     global _camera_instance
-    if _camera_instance is None:
-        _camera_instance = RPiCameraService()
-    return _camera_instance
+    with _camera_lock:
+        if _camera_instance is None:
+            _camera_instance = RPiCameraService()
+        return _camera_instance
 
 def release_camera():
     """Release global camera instance"""
     global _camera_instance
-    if _camera_instance:
-        _camera_instance.release()
-        _camera_instance = None
+    with _camera_lock:
+        if _camera_instance:
+            _camera_instance.release()
+            _camera_instance = None
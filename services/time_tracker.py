@@ -1,46 +1,57 @@
 # services/time_tracker.py
 
-import sqlite3
-from datetime import datetime
+from database.db_operations import time_db
+from utils.time_helpers import date_time_now
+
+def normalize_name(name):
+    """
+    Returns the normalized (trimmed, upper-case) form stored in student_name_norm.
+    """
+    return name.strip().upper()
 
 def get_student_time_status(student_id):
     """
     Returns the most recent time status ('IN' or 'OUT') for a given student_id.
     """
     try:
-        conn = sqlite3.connect("database/time_tracking.db")
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT status FROM time_records
-            WHERE student_id = ?
-            ORDER BY timestamp DESC
-            LIMIT 1
-        """, (student_id,))
-        result = cursor.fetchone()
-        conn.close()
+        with time_db() as conn:
+            result = conn.execute("""
+                SELECT status FROM time_records
+                WHERE student_id = ?
+                ORDER BY id DESC
+                LIMIT 1
+            """, (student_id,)).fetchone()
 
         return result[0] if result else None
     except Exception as e:
         print(f"❌ Error fetching time status: {e}")
         return None
 
-def record_time_in(student_info):
+def _record_time(student_info, status, stamp=None):
+    """
+    Writes the time record and the student's current status in a single
+    transaction, so each time IN/OUT costs one commit (one fsync).
+    stamp is an optional (date, time) pair from date_time_now().
+    """
+    date, time = stamp or date_time_now()
+
+    with time_db() as conn, conn:
+        conn.execute("""
+            INSERT INTO time_records (student_id, student_name, student_name_norm, date, time, status)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (student_info['student_id'], student_info['name'], normalize_name(student_info['name']),
+              date, time, status))
+        conn.execute("""
+            INSERT OR REPLACE INTO current_status (student_id, student_name, current_status)
+            VALUES (?, ?, ?)
+        """, (student_info['student_id'], student_info['name'], status))
+
+def record_time_in(student_info, stamp=None):
     """
     Logs a time IN record for the given student.
     """
     try:
-        now = datetime.now()
-        date = now.strftime("%Y-%m-%d")
-        time = now.strftime("%H:%M:%S")
-
-        conn = sqlite3.connect("database/time_tracking.db")
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO time_records (student_id, student_name, date, time, status)
-            VALUES (?, ?, ?, ?, ?)
-        """, (student_info['student_id'], student_info['name'], date, time, 'IN'))
-        conn.commit()
-        conn.close()
+        _record_time(student_info, 'IN', stamp)
         print("🟢 Time IN recorded successfully.")
         return True
     except Exception as e:
@@ -48,23 +59,12 @@ def record_time_in(student_info):
         return False
         
 
-def record_time_out(student_info):
+def record_time_out(student_info, stamp=None):
     """
     Logs a time OUT record for the given student.
     """
     try:
-        now = datetime.now()
-        date = now.strftime("%Y-%m-%d")
-        time = now.strftime("%H:%M:%S")
-
-        conn = sqlite3.connect("database/time_tracking.db")
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO time_records (student_id, student_name, date, time, status)
-            VALUES (?, ?, ?, ?, ?)
-        """, (student_info['student_id'], student_info['name'], date, time, 'OUT'))
-        conn.commit()
-        conn.close()
+        _record_time(student_info, 'OUT', stamp)
         print("🔴 Time OUT recorded successfully.")
         return True
     except Exception as e:
@@ -0,0 +1,40 @@
+# tests/conftest.py - Shared fixtures; hardware-bound services are mocked so controllers import off the Pi
+
+import importlib
+import sys
+import types
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Names the controllers import from modules that need the camera, sensor, GPIO or OpenCV
+HARDWARE_MODULES = {
+    "services.fingerprint": ["authenticate_fingerprint"],
+    "services.license_reader": ["warmup_ocr", "auto_capture_license_rpi", "extract_text_from_image",
+                                "licenseRead", "licenseReadGuest", "cleanup_temp_file"],
+    "services.helmet_infer": ["verify_helmet", "clear_helmet_cache"],
+    "services.led_control": ["set_led_processing", "set_led_success", "set_led_idle"],
+}
+
+
+@pytest.fixture
+def load_controller(monkeypatch):
+    """Import a controller afresh against mocked hardware services; returns (module, fakes by module name)"""
+    fakes = {}
+    for name, attrs in HARDWARE_MODULES.items():
+        module = types.ModuleType(name)
+        for attr in attrs:
+            setattr(module, attr, mock.MagicMock(name=f"{name}.{attr}"))
+        monkeypatch.setitem(sys.modules, name, module)
+        fakes[name] = module
+
+    def load(name):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+        return importlib.import_module(name), fakes
+
+    return load
@@ -0,0 +1,39 @@
+# tests/test_async_writer.py - Background writer ordering and failure propagation
+
+import sqlite3
+import time
+
+import pytest
+
+from database import async_writer
+
+
+def test_result_is_returned_through_future():
+    assert async_writer.submit(lambda a, b: a + b, 2, b=3).result(timeout=5) == 5
+
+
+def test_exception_propagates_to_future():
+    def locked():
+        raise sqlite3.OperationalError("database is locked")
+
+    write = async_writer.submit(locked)
+    with pytest.raises(sqlite3.OperationalError, match="locked"):
+        write.result(timeout=5)
+
+
+def test_writer_keeps_running_after_a_failure():
+    async_writer.submit(lambda: 1 / 0)
+    assert async_writer.submit(lambda: "still alive").result(timeout=5) == "still alive"
+
+
+def test_flush_waits_for_queued_writes_in_order():
+    done = []
+
+    def write(n):
+        time.sleep(0.01)
+        done.append(n)
+
+    for n in range(5):
+        async_writer.submit(write, n)
+    async_writer.flush()
+    assert done == [0, 1, 2, 3, 4]
@@ -0,0 +1,47 @@
+# tests/test_db_operations.py - Per-thread WAL connections to time_tracking.db
+
+import threading
+
+import pytest
+
+from database import db_operations
+from database.db_operations import close_time_db, time_db
+
+
+@pytest.fixture
+def temp_time_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_operations, "TIME_TRACKING_DB", str(tmp_path / "time_tracking.db"))
+    close_time_db()
+    yield
+    close_time_db()
+
+
+def test_connection_is_reused_per_thread(temp_time_db):
+    with time_db() as first, time_db() as second:
+        assert first is second
+
+    other = []
+
+    def borrow():
+        with time_db() as conn:
+            other.append(conn)
+
+    thread = threading.Thread(target=borrow)
+    thread.start()
+    thread.join()
+    assert other[0] is not first
+
+
+def test_connection_pragmas(temp_time_db):
+    with time_db() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] >= 5000
+
+
+def test_close_time_db_reopens_on_next_use(temp_time_db):
+    with time_db() as before:
+        pass
+    close_time_db()
+    with time_db() as after:
+        assert after is not before
+        assert after.execute("SELECT 1").fetchone() == (1,)
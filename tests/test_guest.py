@@ -0,0 +1,70 @@
+# tests/test_guest.py - Recent-guest matching and cache invalidation around guest time records
+
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+GUEST = {'name': 'Juan Dela Cruz', 'plate_number': 'ABC123', 'office': 'CSS Office'}
+STAMP = ('2030-01-15', '08:00:00')
+LICENSE_OK = SimpleNamespace(document_verified="Driver's License Detected")
+
+
+@pytest.fixture
+def guest(load_controller):
+    pytest.importorskip("cachetools")
+    pytest.importorskip("rapidfuzz")
+    module, _ = load_controller("controllers.guest")
+    return module
+
+
+def test_exact_recent_guest_matches(guest):
+    guest.remember_recent_guest(GUEST, STAMP)
+    status, info = guest._match_recent_guest(guest.normalize_name(" juan dela cruz "))
+    assert status == 'IN'
+    assert info['plate_number'] == 'ABC123'
+    assert info['similarity_score'] == 1.0
+
+
+def test_similar_recent_guest_does_not_short_circuit(guest):
+    guest.remember_recent_guest(GUEST, STAMP)
+    assert guest._match_recent_guest(guest.normalize_name("Juan Dela Rosa")) == (None, None)
+
+
+def test_time_in_clears_status_cache_and_remembers_guest(guest, monkeypatch):
+    monkeypatch.setattr(guest, "record_time_in", lambda data, stamp: True)
+    guest._guest_status_cache["stale"] = ('OUT', None)
+    result = guest.process_guest_time_in(GUEST, LICENSE_OK)
+    assert result['success']
+    assert len(guest._guest_status_cache) == 0
+    assert guest._match_recent_guest("JUAN DELA CRUZ")[0] == 'IN'
+
+
+def test_failed_time_in_reports_failure(guest, monkeypatch):
+    monkeypatch.setattr(guest, "record_time_in", lambda data, stamp: False)
+    result = guest.process_guest_time_in(GUEST, LICENSE_OK)
+    assert not result['success']
+    assert result['status'] == "❌ TIME IN FAILED"
+    assert guest._match_recent_guest("JUAN DELA CRUZ") == (None, None)
+
+
+def test_time_out_forgets_guest_and_clears_status_cache(guest, monkeypatch):
+    monkeypatch.setattr(guest, "record_time_out", lambda data, stamp: True)
+    guest.remember_recent_guest(GUEST, STAMP)
+    guest._guest_status_cache["stale"] = ('IN', None)
+    result = guest.process_guest_time_out(GUEST)
+    assert result['success']
+    assert len(guest._guest_status_cache) == 0
+    assert guest._match_recent_guest("JUAN DELA CRUZ") == (None, None)
+
+
+def test_raising_time_out_reports_failure_and_keeps_guest(guest, monkeypatch):
+    def locked(data, stamp):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(guest, "record_time_out", locked)
+    guest.remember_recent_guest(GUEST, STAMP)
+    result = guest.process_guest_time_out(GUEST)
+    assert not result['success']
+    assert result['status'] == "❌ TIME OUT FAILED"
+    assert guest._match_recent_guest("JUAN DELA CRUZ")[0] == 'IN'
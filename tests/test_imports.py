@@ -0,0 +1,60 @@
+# tests/test_imports.py - Catch broken imports between the project's own modules
+
+import ast
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Packages and top-level modules that belong to this project
+LOCAL_PACKAGES = ("config", "controllers", "database", "services", "utils")
+
+
+def _source_files():
+    return sorted(path for path in ROOT.rglob("*.py") if "tests" not in path.relative_to(ROOT).parts)
+
+
+def _module_path(module):
+    """Path of a project module ('services.fingerprint' -> services/fingerprint.py), or None"""
+    base = ROOT.joinpath(*module.split("."))
+    for candidate in (base.with_suffix(".py"), base / "__init__.py"):
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def _top_level_names(path):
+    """Names a module binds at top level (defs, classes, assignments and imports)"""
+    names = set()
+    for node in ast.parse(path.read_text(encoding="utf-8")).body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                names.update(n.id for n in ast.walk(target) if isinstance(n, ast.Name))
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split(".")[0] for alias in node.names)
+    return names
+
+
+def _local_from_imports():
+    """(importing file, module, name) for every 'from <project module> import name'"""
+    for path in _source_files():
+        for node in ast.walk(ast.parse(path.read_text(encoding="utf-8"))):
+            if (isinstance(node, ast.ImportFrom) and node.level == 0 and node.module
+                    and node.module.split(".")[0] in LOCAL_PACKAGES):
+                for alias in node.names:
+                    yield path.relative_to(ROOT), node.module, alias.name
+
+
+@pytest.mark.parametrize("importer, module, name", list(_local_from_imports()))
+def test_local_import_resolves(importer, module, name):
+    """Every name imported from a project module exists there (no hardware needed to check)"""
+    if name == "*" or _module_path(f"{module}.{name}") is not None:
+        return
+    path = _module_path(module)
+    assert path is not None, f"{importer}: module {module} not found"
+    assert name in _top_level_names(path), f"{importer}: cannot import {name} from {module}"
+
@@ -0,0 +1,40 @@
+# tests/test_student.py - Fingerprint/helmet overlap: the sensor poll is cancelled on every failed exit
+
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def student(load_controller):
+    """controllers.student with a fake fingerprint wait that blocks until cancelled"""
+    module, fakes = load_controller("controllers.student")
+    started = threading.Event()
+    cancels = []
+
+    def wait_for_finger(cancel):
+        cancels.append(cancel)
+        started.set()
+        cancel.wait(5)
+        return None
+
+    fakes["services.fingerprint"].authenticate_fingerprint.side_effect = wait_for_finger
+    module.fake_helmet = fakes["services.helmet_infer"].verify_helmet
+    module.fingerprint_cancel = lambda: (started.wait(5), cancels[0])[1]
+    return module
+
+
+@pytest.mark.parametrize("error", [RuntimeError("camera unplugged"), KeyboardInterrupt()])
+def test_helmet_exception_cancels_fingerprint(student, error):
+    student.fake_helmet.side_effect = error
+    with pytest.raises(type(error)):
+        student.student_verification()
+    assert student.fingerprint_cancel().is_set()
+
+
+def test_helmet_failure_cancels_before_prompt(student, monkeypatch):
+    student.fake_helmet.return_value = False
+    at_prompt = []
+    monkeypatch.setattr("builtins.input", lambda prompt="": at_prompt.append(student.fingerprint_cancel().is_set()))
+    assert student.student_verification() is None
+    assert at_prompt == [True]
@@ -0,0 +1,34 @@
+# tests/test_time_helpers.py - License date parsing
+
+from datetime import date
+
+import pytest
+
+from utils.time_helpers import date_time_now, parse_license_date
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("2030-01-15", date(2030, 1, 15)),
+    ("2030-1-5", date(2030, 1, 5)),
+    (" 2030-01-15 ", date(2030, 1, 15)),
+    ("03/04/2030", date(2030, 3, 4)),     # Ambiguous: month-first wins
+    ("12/25/2030", date(2030, 12, 25)),
+    ("25/12/2030", date(2030, 12, 25)),   # Not a month-first date: falls back to day-first
+    ("1/2/2030", date(2030, 1, 2)),
+])
+def test_parse_license_date(raw, expected):
+    assert parse_license_date(raw) == expected
+
+
+@pytest.mark.parametrize("raw", [
+    None, "", "N/A", "2030-02-30", "2030-13-01", "13/13/2030", "31/31/2030",
+    "2030/01/15", "01-15-2030", "２０３０-01-15",
+])
+def test_parse_license_date_rejects(raw):
+    assert parse_license_date(raw) is None
+
+
+def test_date_time_now_shape():
+    day, clock = date_time_now()
+    assert date.fromisoformat(day)
+    assert len(clock) == 8 and clock[2] == clock[5] == ":"
@@ -1,5 +1,9 @@
 from utils.gui_helpers import show_message_gui
 
+# Banner rules, built once
+_MENU_SEP = '=' * 50
+_SECTION_SEP = '=' * 60
+
 def show_results_gui(title, message):
     """Show results in GUI message box"""
     show_message_gui(title, message)
@@ -17,12 +21,8 @@ def get_num(max_number):
 
 def display_menu(menu_config):
     """Display formatted menu with title and options"""
-    print(f"\n{'=' * 50}")
-    print(menu_config['title'])
-    print('=' * 50)
-    for option in menu_config['options']:
-        print(option)
-    print('=' * 50)
+    options = "\n".join(menu_config['options'])
+    print(f"\n{_MENU_SEP}\n{menu_config['title']}\n{_MENU_SEP}\n{options}\n{_MENU_SEP}")
 
 def get_user_input(prompt):
     """Get user input with consistent formatting"""
@@ -36,36 +36,35 @@ def confirm_action(message, dangerous=False):
 def display_separator(title=""):
     """Display formatted separator with optional title"""
     if title:
-        print(f"\n{'=' * 60}")
-        print(f"🎯 {title}")
-        print('=' * 60)
+        print(f"\n{_SECTION_SEP}\n🎯 {title}\n{_SECTION_SEP}")
     else:
-        print('=' * 60)
+        print(_SECTION_SEP)
         
 def display_verification_result(user_info, verification_data):
     """Display verification results for both students and guests"""
     display_separator("VERIFICATION RESULT")
     
+    # Result block is assembled first and written in one print
     # Common verification checks
     checks = verification_data.get('checks', {})
-    for check_name, (status, details) in checks.items():
-        status_icon = "✅" if status else "❌"
-        print(f"{check_name}: {status_icon} {details}")
+    lines = [f"{check_name}: {'✅' if status else '❌'} {details}"
+             for check_name, (status, details) in checks.items()]
     
     # User information
-    print(f"👤 Name: {user_info['name']}")
+    lines.append(f"👤 Name: {user_info['name']}")
     if not user_info.get('is_guest', False):
-        print(f"🆔 Student ID: {user_info['student_id']}")
-        print(f"📚 Course: {user_info['course']}")
+        lines.append(f"🆔 Student ID: {user_info['student_id']}")
+        lines.append(f"📚 Course: {user_info['course']}")
     else:
-        print(f"🚗 Plate: {user_info['plate_number']}")
-        print(f"🏢 Visiting: {user_info['office']}")
+        lines.append(f"🚗 Plate: {user_info['plate_number']}")
+        lines.append(f"🏢 Visiting: {user_info['office']}")
     
     # Overall status
     overall_status = verification_data.get('overall_status', 'UNKNOWN')
     status_color = verification_data.get('status_color', '🔴')
-    print(f"\n{status_color} FINAL STATUS: {overall_status}")
-    display_separator()
+    lines.append(f"\n{status_color} FINAL STATUS: {overall_status}")
+    lines.append(_SECTION_SEP)
+    print("\n".join(lines))
     
     # Show GUI result
     show_results_gui("Verification Complete", verification_data.get('gui_message', ''))
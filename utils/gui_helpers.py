@@ -1,7 +1,9 @@
-import tkinter as tk
-from tkinter import messagebox
+# tkinter is imported inside each dialog so the console flows never load Tk until a dialog opens
 
 def show_message_gui(title, message):
+    import tkinter as tk
+    from tkinter import messagebox
+    
     root = tk.Tk()
     root.withdraw()  # Hide the root window
     messagebox.showinfo(title, message)
@@ -13,6 +15,9 @@ def show_results_gui(title, message):
 
 def get_guest_info_gui(detected_name):
     """Collect guest information through GUI interface"""
+    import tkinter as tk
+    from tkinter import messagebox
+    
     root = tk.Tk()
     root.title("Guest Information")
     root.geometry("400x300")
@@ -89,6 +94,8 @@ def get_guest_info_gui(detected_name):
 
 def updated_guest_office_gui(guest_name, current_office):
     """Allow a returning guest to update their office location"""
+    import tkinter as tk
+    
     root = tk.Tk()
     root.title("Select New Office")
     root.geometry("400x300")
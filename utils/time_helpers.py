@@ -0,0 +1,46 @@
+import re
+import time
+from datetime import date
+from functools import lru_cache
+
+# License expiration shapes, matched once; dates are built from the captured groups instead of strptime.
+# Slashed dates are month-first, falling back to day-first when that is not a real date.
+_ISO_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+_YMD_DATE_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})', re.ASCII)
+_SLASH_DATE_RE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})', re.ASCII)
+
+def date_time_now():
+    """Read the local clock once and return ('YYYY-MM-DD', 'HH:MM:SS')"""
+    t = time.localtime()
+    return (f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d}",
+            f"{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}")
+
+@lru_cache(maxsize=512)
+def parse_license_date(date_str):
+    """Parse a stored license date into a date (memoized); None if it matches no known format"""
+    if not date_str:
+        return None
+    date_str = date_str.strip()
+    
+    # Zero-padded ISO dates (what enrollment stores) parse in C
+    if _ISO_DATE_RE.fullmatch(date_str):
+        try:
+            return date.fromisoformat(date_str)
+        except ValueError:
+            return None
+    
+    m = _YMD_DATE_RE.fullmatch(date_str)
+    if m:
+        candidates = ((int(m[1]), int(m[2]), int(m[3])),)
+    elif (m := _SLASH_DATE_RE.fullmatch(date_str)):
+        first, second, year = int(m[1]), int(m[2]), int(m[3])
+        candidates = ((year, first, second), (year, second, first))
+    else:
+        return None
+    
+    for year, month, day in candidates:
+        try:
+            return date(year, month, day)
+        except ValueError:
+            continue
+    return None